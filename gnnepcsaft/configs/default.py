@@ -30,6 +30,17 @@ def get_config():
     config.weight_decay = 1e-2
     config.dataset = "esper"
     config.checkpoint = ""
+    # processes for ePC-SAFT evaluation in each trainer process, 0 for all cores
+    config.eos_workers = 2
+    # significant digits of T, P to merge repeated states in evaluation, None for exact
+    config.eos_state_digits = None
+    # weight of the ThermoML density and vapor pressure loss in training,
+    # mixed with the parameter loss as (1 - w) * para + w * eos, 0 to turn it off
+    config.eos_loss_weight = 0.0
+    config.eos_states = 16  # ThermoML states sampled per molecule and step
+    # fraction of the ThermoML states of each molecule kept out of the loss for validation
+    config.eos_holdout = 0.2
+    config.eos_precision = "float64"  # precision of the JAX kernels of the loss
 
     # GNN hyperparameters.
     config.model_name = "esper1"
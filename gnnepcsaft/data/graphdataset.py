@@ -182,6 +182,24 @@ def get_padded_array(states: torch.Tensor, pad_size: int = 2**10) -> torch.Tenso
     return states[:pad_size, :]
 
 
+def pad_states(states_list: list[torch.Tensor]) -> tuple[torch.Tensor, torch.Tensor]:
+    """Stacks the states of many molecules in an array of shape (B, N, 5) suitable
+    for the batched `jax` functions of `epcsaftpure_jax`.
+
+    N is the nearest power of two bigger than the largest number of states,
+    so only a few shapes need to be compiled. Returns the padded states and
+    a (B, N) mask that is False for padding and for all-zero rows (no data).
+    """
+    pad = _nearest_bigger_power_of_two(max(states.shape[0] for states in states_list))
+    padded = torch.zeros((len(states_list), pad, 5), dtype=torch.float64)
+    mask = torch.zeros((len(states_list), pad), dtype=torch.bool)
+    for i, states in enumerate(states_list):
+        n = states.shape[0]
+        padded[i, :n] = states
+        mask[i, :n] = torch.any(states != 0, dim=1)
+    return padded, mask
+
+
 def _nearest_bigger_power_of_two(x: int) -> int:
     """Computes the nearest power of two greater than x for padding."""
     y = 2
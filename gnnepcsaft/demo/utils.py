@@ -8,11 +8,13 @@ import matplotlib.pyplot as plt
 import numpy as np
 import seaborn as sns
 import torch
+from absl import logging
 from rdkit import Chem
 
 from ..configs.default import get_config
 from ..data.graph import from_InChI, from_smiles
 from ..data.graphdataset import Ramirez, ThermoMLDataset
+from ..epcsaft.parallel import run_jobs
 from ..train.models import PNAPCSAFT, PNApcsaftL
 from ..train.utils import mape, rhovp_data
 
@@ -237,25 +239,39 @@ def plotvp(inchi, molecule_name, models, data):
         plt.show()
 
 
-def model_para_fn(model: PNAPCSAFT):
+def model_para_fn(model: PNAPCSAFT, max_workers: Union[int, None] = None):
     """Calculates density and/or vapor pressure mean absolute percentage error
     between ThermoML Archive experimental data and predicted data with ePC-SAFT
-    using the model estimated parameters."""
+    using the model estimated parameters.
+
+    ePC-SAFT is evaluated for all molecules in parallel with `max_workers` processes
+    (all cores by default). Molecules whose evaluation raised are logged and left out."""
     model_para = {}
     model_array = {}
+    jobs, inchis, list_params = [], [], []
     model.eval()
     with torch.no_grad():
         for graphs in testloader:
             graphs = graphs.to(device)
             parameters = model(graphs)
-            params = parameters.squeeze().to(torch.float64).numpy()
-            rho = graphs.rho.view(-1, 5).to(torch.float64).numpy()
-            vp = graphs.vp.view(-1, 5).to(torch.float64).numpy()
-            mden_array, mvp_array = mape(params, rho, vp, False)
-            mden, mvp = mden_array.mean(), mvp_array.mean()
-            parameters = parameters.tolist()[0]
-            model_para[graphs.InChI] = (parameters, mden, mvp)
-            model_array[graphs.InChI] = (mden_array, mvp_array)
+            jobs.append(
+                (
+                    parameters.squeeze().to(torch.float64).numpy(),
+                    graphs.rho.view(-1, 5).to(torch.float64).numpy(),
+                    graphs.vp.view(-1, 5).to(torch.float64).numpy(),
+                    False,
+                )
+            )
+            inchis.append(graphs.InChI)
+            list_params.append(parameters.tolist()[0])
+    results = run_jobs(mape, jobs, max_workers)
+    for inchi, parameters, job in zip(inchis, list_params, results):
+        if job.error is not None:
+            logging.warning(f"ePC-SAFT evaluation failed for {inchi}: {job.error}")
+            continue
+        mden_array, mvp_array = job.result
+        model_para[inchi] = (parameters, mden_array.mean(), mvp_array.mean())
+        model_array[inchi] = (mden_array, mvp_array)
     return model_para, model_array
 
 
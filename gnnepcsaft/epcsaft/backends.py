@@ -0,0 +1,317 @@
+"""Module for the registry of ePC-SAFT backends of pure component properties.
+
+Every backend computes one property ("den" for density, "vp" for vapor
+pressure) for all rows (T, P, phase, ..., y) of `states`, shape (N, 5),
+and returns the values, NaN where a state fails, and the `SolverStatus`
+of each state. `pure_den` and `pure_vp` try the backends in the order of
+`backend_order` and hand the failed states to the next one. Repeated
+states are solved once, see `unique_states`.
+
+The order is a deployment choice: `GNNEPCSAFT_EOS_BENCHMARK` points to the
+JSON written by `benchmark`, and the backends are ranked by their measured
+throughput. Without it `DEFAULT_ORDER` is used.
+"""
+
+import json
+import os
+from functools import lru_cache
+from typing import Callable, Optional, Sequence
+
+import numpy as np
+from absl import logging
+
+from . import utils
+from .status import RETRY, SolverStatus
+
+BENCHMARK_ENV = "GNNEPCSAFT_EOS_BENCHMARK"
+PROPERTIES = ("den", "vp")
+# the backends used before the registry, so deployments without a benchmark keep them
+DEFAULT_ORDER = {"den": ("feos",), "vp": ("superanc", "feos")}
+# backends with a larger 99th percentile deviation from feos in the benchmark are not used
+MAX_DEVIATION = 1.0e-3
+# columns of the states each property depends on: (T, P, phase) and T
+STATE_COLUMNS = {"den": (0, 1, 2), "vp": (0,)}
+
+_backends: dict = {prop: {} for prop in PROPERTIES}
+
+
+def register_backend(prop: str, name: str) -> Callable:
+    """
+    Decorator registering `fn(parameters, states) -> (values, status)`
+    as backend `name` of property `prop`.
+    """
+
+    def decorator(fn: Callable) -> Callable:
+        _backends[prop][name] = fn
+        return fn
+
+    return decorator
+
+
+def available_backends(prop: str) -> tuple:
+    "Names of the registered backends of `prop`."
+    return tuple(_backends[prop])
+
+
+def get_backend(prop: str, name: str) -> Callable:
+    "Backend `name` of `prop`, see `register_backend`."
+    return _backends[prop][name]
+
+
+def _per_state(fn: Callable, parameters: np.ndarray, states: np.ndarray):
+    "Evaluates single state `fn` for every row of `states`, NaN where it raises."
+    out = np.full(states.shape[0], np.nan)
+    for i, state in enumerate(states):
+        try:
+            out[i] = fn(parameters, state)
+        except Exception:  # pylint: disable = broad-exception-caught
+            continue
+    return out, _status_from_nan(out)
+
+
+def _status_from_nan(values: np.ndarray) -> np.ndarray:
+    "Status of backends that only signal failure with NaN."
+    return np.where(
+        np.isnan(values), SolverStatus.NO_ROOT, SolverStatus.CONVERGED
+    ).astype(np.int8)
+
+
+def _only_nonassoc_nonpolar(fn: Callable) -> Callable:
+    "Backends of the (m, sigma, e) model, NaN for associating and polar compounds."
+
+    def wrapper(parameters: np.ndarray, states: np.ndarray) -> tuple:
+        if not utils.superanc_compatible(parameters):
+            return np.full(states.shape[0], np.nan), np.full(
+                states.shape[0], SolverStatus.UNSUPPORTED, dtype=np.int8
+            )
+        return fn(parameters, states)
+
+    wrapper.__doc__ = fn.__doc__
+    return wrapper
+
+
+@register_backend("den", "feos")
+def _den_feos(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Density with feos along isobars."
+    return utils.pure_den_feos_series(parameters, states, return_status=True)
+
+
+@register_backend("den", "teqp")
+@_only_nonassoc_nonpolar
+def _den_teqp(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Saturated liquid or vapor density with teqp."
+    return _per_state(utils.pure_den_teqp, parameters, states)
+
+
+@register_backend("den", "pcsaft")
+@_only_nonassoc_nonpolar
+def _den_pcsaft(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Density with the `pcsaft` package."
+    return _per_state(utils.pure_den_pcsaft, parameters, states)
+
+
+@register_backend("vp", "feos")
+def _vp_feos(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Vapor pressure with feos along the saturation curve."
+    return utils.pure_vp_feos_curve(parameters, states, return_status=True)
+
+
+@register_backend("vp", "superanc")
+@_only_nonassoc_nonpolar
+def _vp_superanc(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Vapor pressure from the PC-SAFT superancillary."
+    return utils.pure_vp_superanc(parameters, states, return_status=True)
+
+
+@register_backend("vp", "teqp")
+@_only_nonassoc_nonpolar
+def _vp_teqp(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Vapor pressure with teqp."
+    return _per_state(utils.pure_vp_teqp, parameters, states)
+
+
+@register_backend("vp", "pcsaft")
+@_only_nonassoc_nonpolar
+def _vp_pcsaft(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Vapor pressure with the `pcsaft` package."
+    return _per_state(utils.pure_vp_pcsaft, parameters, states)
+
+
+def _jax_batch(prop: str, parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "One molecule through the batched JAX kernels, states padded to a power of two."
+    # pylint: disable = import-outside-toplevel
+    from .epcsaftpure_jax import (
+        NUM_PARA,
+        batch_pure_den_result,
+        batch_pure_dispatch,
+        batch_pure_sat,
+        pure_variant,
+    )
+
+    num_states = states.shape[0]
+    if pure_variant(parameters) is None:
+        return np.full(num_states, np.nan), np.full(
+            num_states, SolverStatus.UNSUPPORTED, dtype=np.int8
+        )
+    pad = 2 ** int(np.ceil(np.log2(max(num_states, 2))))
+    padded = np.zeros((1, pad, 5))
+    padded[0, :num_states] = states
+    if prop == "vp":
+        # the last column is the initial guess of the saturation solver,
+        # clipped into the two phase region, so any positive pressure works
+        padded[0, :, -1] = np.where(padded[0, :, -1] > 0, padded[0, :, -1], 1.0e5)
+    mask = np.zeros((1, pad), bool)
+    mask[0, :num_states] = True
+    para = np.zeros((1, NUM_PARA))
+    para[0, : len(parameters)] = parameters[:NUM_PARA]
+
+    res = batch_pure_dispatch(
+        batch_pure_den_result if prop == "den" else batch_pure_sat, para, padded, mask
+    )
+    value = res.rho if prop == "den" else res.p
+    value = np.where(res.converged, value, np.nan)[0, :num_states]
+    return value.astype(np.float64), res.status[0, :num_states].astype(np.int8)
+
+
+@register_backend("den", "jax")
+def _den_jax(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Density with the JAX kernels, see `batch_pure_den_result`."
+    return _jax_batch("den", parameters, states)
+
+
+@register_backend("vp", "jax")
+def _vp_jax(parameters: np.ndarray, states: np.ndarray) -> tuple:
+    "Vapor pressure with the JAX kernels, see `batch_pure_vp`."
+    return _jax_batch("vp", parameters, states)
+
+
+@lru_cache
+def load_benchmark(path: Optional[str] = None) -> Optional[dict]:
+    """
+    Benchmark results written by `benchmark` from `path`, or from
+    `GNNEPCSAFT_EOS_BENCHMARK` when not given. None when neither is set.
+    """
+    path = path or os.environ.get(BENCHMARK_ENV)
+    if not path:
+        return None
+    with open(os.path.expanduser(path), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def backend_order(prop: str, benchmark: Optional[dict] = None) -> tuple:
+    """
+    Backends of `prop` in the order they are tried. With `benchmark`
+    (by default `load_benchmark()`), the benchmarked backends with a 99th
+    percentile deviation from feos within `MAX_DEVIATION` come first, fastest first,
+    followed by the rest of `DEFAULT_ORDER` as fallback. Results without
+    `p99_deviation` (e.g. no state solved) do not pass the gate.
+    """
+    benchmark = benchmark if benchmark is not None else load_benchmark()
+    results = (benchmark or {}).get(prop, {})
+    ranked = sorted(
+        (
+            name
+            for name, result in results.items()
+            if name in _backends[prop]
+            and result.get("p99_deviation", np.inf) <= MAX_DEVIATION
+        ),
+        key=lambda name: -results[name]["states_per_s"],
+    )
+    return tuple(ranked) + tuple(
+        name for name in DEFAULT_ORDER[prop] if name not in ranked
+    )
+
+
+def _round_significant(values: np.ndarray, digits: int) -> np.ndarray:
+    "`values` rounded to `digits` significant digits."
+    magnitude = np.floor(np.log10(np.abs(np.where(values == 0, 1.0, values))))
+    scale = 10.0 ** (magnitude - digits + 1)
+    return np.round(values / scale) * scale
+
+
+def unique_states(
+    prop: str, states: np.ndarray, digits: Optional[int] = None
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Rows of `states` with distinct `STATE_COLUMNS` of `prop`, compared after
+    rounding to `digits` significant digits when given. Returns the index of
+    the first row of each distinct state and the inverse mapping every row
+    to its distinct state, so `values[index][inverse]` scatters back.
+    """
+    keys = states[:, STATE_COLUMNS[prop]]
+    if digits is not None:
+        keys = _round_significant(keys, digits)
+    _, index, inverse = np.unique(keys, axis=0, return_index=True, return_inverse=True)
+    return index, inverse.reshape(-1)
+
+
+def pure_property(
+    prop: str,
+    parameters: np.ndarray,
+    states: np.ndarray,
+    order: Optional[Sequence[str]] = None,
+    digits: Optional[int] = None,
+) -> tuple:
+    """
+    Property `prop` ("den" or "vp") of a pure component for all rows of
+    `states`, shape (N, 5). Repeated states (`unique_states`, equal after
+    rounding T and P to `digits` significant digits when given) are solved
+    once. Each backend of `order` (by default `backend_order(prop)`) gets
+    the states failed by the previous ones with a status in `RETRY`.
+    Vapor pressure states at or above the critical temperature
+    (`utils.above_critical`) are rejected before any backend runs.
+
+    Returns
+    -------
+    values : ndarray, shape (N,)
+        NaN where all backends fail.
+    status : ndarray, shape (N,)
+        `SolverStatus` of each state from the last backend that tried it.
+    """
+    parameters = np.asarray(parameters, dtype=np.float64)
+    states = np.asarray(states, dtype=np.float64)
+    index, inverse = unique_states(prop, states, digits)
+    states = states[index]
+    out = np.full(states.shape[0], np.nan)
+    status = np.full(states.shape[0], SolverStatus.UNSUPPORTED, dtype=np.int8)
+    if prop == "vp":
+        status[utils.above_critical(parameters, states)] = SolverStatus.ABOVE_CRITICAL
+    for name in order or backend_order(prop):
+        todo = np.isin(status, RETRY)
+        if not np.any(todo):
+            break
+        try:
+            out[todo], status[todo] = _backends[prop][name](parameters, states[todo])
+        except Exception as err:  # pylint: disable = broad-exception-caught
+            logging.debug(f"{prop} backend {name} failed: {err!r}")
+    return out[inverse], status[inverse]
+
+
+def pure_den(
+    parameters: np.ndarray,
+    states: np.ndarray,
+    order: Optional[Sequence[str]] = None,
+    return_status: bool = False,
+    digits: Optional[int] = None,
+):
+    """
+    Density (mol / m^3) of a pure component, and with `return_status`
+    the `SolverStatus` of each state, see `pure_property`.
+    """
+    den, status = pure_property("den", parameters, states, order, digits)
+    return (den, status) if return_status else den
+
+
+def pure_vp(
+    parameters: np.ndarray,
+    states: np.ndarray,
+    order: Optional[Sequence[str]] = None,
+    return_status: bool = False,
+    digits: Optional[int] = None,
+):
+    """
+    Vapor pressure (Pa) of a pure component, and with `return_status`
+    the `SolverStatus` of each state, see `pure_property`.
+    """
+    vp, status = pure_property("vp", parameters, states, order, digits)
+    return (vp, status) if return_status else vp
@@ -0,0 +1,198 @@
+"""Module for benchmarking the ePC-SAFT backends on ThermoML states.
+
+Runs density and vapor pressure of a sample of molecules through every
+backend of `backends` and reports throughput, latency, failure rate,
+unsupported rate and deviation from feos. The JSON written to `--output` is read by
+`backends.backend_order` through `GNNEPCSAFT_EOS_BENCHMARK`.
+
+Usage::
+
+    python -m gnnepcsaft.epcsaft.benchmark --workdir=. --output=benchmark.json
+"""
+
+import json
+import time
+from typing import Optional, Sequence
+
+import jax
+import numpy as np
+from absl import app, flags, logging
+
+from .backends import PROPERTIES, available_backends, get_backend
+from .compilation import enable_compilation_cache
+from .dtypes import PRECISIONS, default_precision, set_precision
+from .precision import thermoml_states
+from .sharding import set_host_device_count
+from .status import SolverStatus, status_counts
+
+REFERENCE = "feos"
+
+
+def molecule_jobs(
+    para: np.ndarray,
+    states: np.ndarray,
+    mask: np.ndarray,
+    max_states: Optional[int] = None,
+    seed: int = 0,
+) -> list[tuple]:
+    """
+    (parameters, states) of each molecule with data from padded (B, N, 5)
+    `states`, with at most `max_states` states sampled per molecule.
+    """
+    rng = np.random.default_rng(seed)
+    jobs = []
+    for parameters, states_i, mask_i in zip(para, states, mask):
+        states_i = states_i[mask_i]
+        if states_i.shape[0] == 0:
+            continue
+        if max_states and states_i.shape[0] > max_states:
+            states_i = states_i[rng.choice(states_i.shape[0], max_states, False)]
+        jobs.append((parameters, states_i))
+    return jobs
+
+
+def time_backend(prop: str, name: str, jobs: Sequence[tuple]) -> tuple:
+    """
+    Evaluates backend `name` of `prop` on every job, after one untimed
+    warm-up pass over all jobs (JIT compilation of every kernel variant
+    and shape of the JAX backend, caches of the others).
+    Returns the predictions, their `SolverStatus`, the wall time
+    of each call (s) and of the warm-up.
+    """
+    backend = get_backend(prop, name)
+    start = time.perf_counter()
+    for job in jobs:
+        backend(*job)
+    warmup_time = time.perf_counter() - start
+
+    preds, status, latencies = [], [], []
+    for parameters, states in jobs:
+        start = time.perf_counter()
+        pred, status_i = backend(parameters, states)
+        latencies.append(time.perf_counter() - start)
+        preds.append(np.asarray(pred, dtype=np.float64))
+        status.append(status_i)
+    return np.concatenate(preds), np.concatenate(status), latencies, warmup_time
+
+
+def deviation_stats(pred: np.ndarray, ref: np.ndarray) -> dict:
+    "Median, p99 and max relative deviation of `pred` to `ref` where both are solved."
+    solved = np.isfinite(ref) & np.isfinite(pred)
+    dev = np.abs(pred[solved] / ref[solved] - 1.0)
+    if not dev.size:
+        return dict.fromkeys(
+            ("median_deviation", "p99_deviation", "max_deviation"), np.nan
+        )
+    return {
+        "median_deviation": float(np.median(dev)),
+        "p99_deviation": float(np.quantile(dev, 0.99)),
+        "max_deviation": float(np.max(dev)),
+    }
+
+
+def benchmark_property(
+    prop: str, jobs: Sequence[tuple], backends: Optional[Sequence[str]] = None
+) -> dict:
+    """
+    Benchmark of the `backends` of `prop` (all available by default) on `jobs`.
+
+    Returns
+    -------
+    dict
+        For each backend: `states_per_s`, `p50_ms` and `p99_ms` latency of the
+        calls (one per molecule) over the states it attempted (not
+        `SolverStatus.UNSUPPORTED`), `warmup_s` of the first pass, `failure_rate`
+        (NaN states among the attempted ones), `unsupported_rate` (unsupported
+        states among all), number of states of each `SolverStatus` (`status`)
+        and `median_deviation`, `p99_deviation` and `max_deviation` relative to
+        feos over the states solved by both.
+    """
+    backends = list(backends or available_backends(prop))
+    # the reference runs first so the others can be compared to it
+    if REFERENCE in backends:
+        backends.remove(REFERENCE)
+    backends.insert(0, REFERENCE)
+
+    # calls of molecules without any attempted state only check the parameters
+    bounds = np.cumsum([states.shape[0] for _, states in jobs])[:-1]
+    results, ref = {}, None
+    for name in backends:
+        try:
+            pred, status, latencies, warmup_time = time_backend(prop, name, jobs)
+        except Exception as err:  # pylint: disable = broad-exception-caught
+            logging.warning(f"{prop} backend {name} not available: {err!r}")
+            continue
+        attempted = status != SolverStatus.UNSUPPORTED
+        calls = np.asarray([np.any(job) for job in np.split(attempted, bounds)])
+        latencies = np.asarray(latencies)[calls]
+        if name == REFERENCE:
+            ref = pred
+        result = dict.fromkeys(
+            ("states_per_s", "p50_ms", "p99_ms", "failure_rate"), np.nan
+        )
+        if latencies.size:
+            result.update(
+                states_per_s=float(attempted.sum() / latencies.sum()),
+                p50_ms=1e3 * float(np.quantile(latencies, 0.5)),
+                p99_ms=1e3 * float(np.quantile(latencies, 0.99)),
+                failure_rate=float(np.mean(np.isnan(pred[attempted]))),
+            )
+        result.update(
+            warmup_s=warmup_time,
+            unsupported_rate=float(np.mean(~attempted)),
+            status=status_counts(status),
+        )
+        if ref is not None:
+            result.update(deviation_stats(pred, ref))
+        results[name] = result
+        logging.info(f"{prop} {name}: {result}")
+    return results
+
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("workdir", None, "Working Directory.")
+flags.DEFINE_string(
+    "dataset", "esper", "Dataset with the parameters: ramirez or esper."
+)
+flags.DEFINE_string("output", "eos_benchmark.json", "Path of the JSON results.")
+flags.DEFINE_integer("max_molecules", 50, "Number of molecules to sample.")
+flags.DEFINE_integer("max_states", 64, "Number of states to sample per molecule.")
+flags.DEFINE_list("backends", None, "Backends to run, all available by default.")
+flags.DEFINE_integer("seed", 0, "Seed of the sampling.")
+flags.DEFINE_enum("precision", "float64", list(PRECISIONS), "Precision of JAX.")
+
+
+def main(argv):
+    """Execution from command line"""
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+
+    set_host_device_count()
+    enable_compilation_cache()
+    set_precision(FLAGS.precision)
+    para, rho_data, vp_data = thermoml_states(
+        FLAGS.workdir, FLAGS.dataset, FLAGS.max_molecules
+    )
+    report = {
+        "meta": {
+            "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "dataset": FLAGS.dataset,
+            "num_molecules": len(para),
+            "max_states": FLAGS.max_states,
+            "jax_precision": default_precision(),
+            "jax_devices": jax.local_device_count(),
+        }
+    }
+    for prop, (states, mask) in zip(PROPERTIES, (rho_data, vp_data)):
+        jobs = molecule_jobs(para, states, mask, FLAGS.max_states, FLAGS.seed)
+        report[prop] = benchmark_property(prop, jobs, FLAGS.backends)
+
+    with open(FLAGS.output, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+    logging.info(f"results written to {FLAGS.output}")
+
+
+if __name__ == "__main__":
+    flags.mark_flags_as_required(["workdir"])
+    app.run(main)
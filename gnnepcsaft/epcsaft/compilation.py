@@ -0,0 +1,157 @@
+"""Module for the JAX compilation cache and compile statistics of the ePC-SAFT kernels.
+
+The on-disk cache is opt-in: the training and benchmark entry points call
+`enable_compilation_cache`, which enables it when the environment variable
+`GNNEPCSAFT_JAX_CACHE` points to a directory. See `warmup` for the command line
+entry point of the ahead-of-time compilation.
+"""
+
+import os
+import time
+from typing import Optional, Sequence
+
+import jax
+import numpy as onp
+from absl import logging
+
+from .epcsaftpure_jax import (
+    NUM_PARA,
+    batch_pure_den_result,
+    batch_pure_dispatch,
+    batch_pure_sat,
+)
+
+CACHE_DIR_ENV = "GNNEPCSAFT_JAX_CACHE"
+COMPILE_EVENT = "/jax/core/compile/backend_compile_duration"
+CACHE_HIT_EVENT = "/jax/compilation_cache/cache_hits"
+CACHE_MISS_EVENT = "/jax/compilation_cache/cache_misses"
+
+# (molecules, states) shape buckets of the kernel calls: `backends` solves one
+# molecule with its states padded to a power of two, and `torch_bridge` pads the
+# molecules of each variant to a power of two, with `config.eos_states` (16)
+# states each and up to `config.batch_size` (512) molecules
+SHAPE_BUCKETS = {
+    "backends": tuple((1, 2**k) for k in range(1, 9)),
+    "bridge": tuple((2**k, 16) for k in range(10)),
+}
+# a parameter vector of each kernel variant, see `pure_variant`
+PURE_VARIANTS = {
+    "nonpolar": (2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0),
+    "polar": (2.0, 3.5, 250.0, 0.0, 0.0, 1.5, 0.0, 0.0),
+    "assoc": (2.0, 3.5, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0),
+    "polar_assoc": (2.0, 3.5, 250.0, 0.03, 2500.0, 1.5, 1.0, 1.0),
+}
+BACKEND_KERNELS = {"den": batch_pure_den_result, "vp": batch_pure_sat}
+
+_stats = {"compiles": 0, "compile_time": 0.0, "cache_hits": 0, "cache_misses": 0}
+
+
+def enable_compilation_cache(cache_dir: Optional[str] = None) -> Optional[str]:
+    """
+    Enables the persistent JAX compilation cache in `cache_dir`,
+    or in `GNNEPCSAFT_JAX_CACHE` when not given. Does nothing when neither is set.
+    Returns the cache directory in use.
+    """
+    cache_dir = cache_dir or os.environ.get(CACHE_DIR_ENV)
+    if not cache_dir:
+        return None
+    cache_dir = os.path.expanduser(cache_dir)
+    os.makedirs(cache_dir, exist_ok=True)
+    jax.config.update("jax_compilation_cache_dir", cache_dir)
+    # the EoS kernels compile in seconds, below the default threshold of the cache
+    jax.config.update("jax_persistent_cache_min_compile_time_secs", 0.0)
+    return cache_dir
+
+
+def _on_duration(event: str, duration: float, **_):
+    if event == COMPILE_EVENT:
+        _stats["compiles"] += 1
+        _stats["compile_time"] += duration
+
+
+def _on_event(event: str, **_):
+    if event == CACHE_HIT_EVENT:
+        _stats["cache_hits"] += 1
+    elif event == CACHE_MISS_EVENT:
+        _stats["cache_misses"] += 1
+
+
+jax.monitoring.register_event_duration_secs_listener(_on_duration)
+jax.monitoring.register_event_listener(_on_event)
+
+
+def compile_stats() -> dict:
+    """
+    XLA compilations of this process: number of executables compiled or
+    loaded from the persistent cache (`compiles`), time spent on them in s
+    (`compile_time`), and persistent cache hits and misses.
+    A `compiles` count that keeps growing in a steady loop means recompilation,
+    e.g. from new batch shapes.
+    """
+    return dict(_stats)
+
+
+def reset_compile_stats():
+    "Resets the counters of `compile_stats`."
+    _stats.update(compiles=0, compile_time=0.0, cache_hits=0, cache_misses=0)
+
+
+def _warmup_backends(prop: str, para, num_states: int):
+    "The `batch_pure_dispatch` call of `backends._jax_batch`."
+    states = onp.tile([300.0, 101325.0, 1.0, 0.0, 101325.0], (len(para), num_states, 1))
+    mask = onp.zeros(states.shape[:2], bool)
+    jax.block_until_ready(
+        batch_pure_dispatch(BACKEND_KERNELS[prop], para, states, mask)
+    )
+
+
+def _warmup_bridge(prop: str, para, num_states: int):
+    "Forward and backward pass of `torch_bridge.batch_prop_from_tensor`."
+    # pylint: disable = import-outside-toplevel
+    import torch
+
+    from .torch_bridge import batch_prop_from_tensor
+
+    para = torch.tensor(para, dtype=torch.float64, requires_grad=True)
+    states = torch.zeros((len(para), num_states, 5), dtype=torch.float64)
+    states[..., 0], states[..., 1] = 300.0, 101325.0
+    mask = torch.zeros(states.shape[:2], dtype=torch.bool)
+    batch_prop_from_tensor(prop, para, states, mask).nansum().backward()
+
+
+def warmup(
+    targets: Sequence[str] = ("backends", "bridge"),
+    kernels: Sequence[str] = ("den", "vp"),
+    variants: Sequence[str] = tuple(PURE_VARIANTS),
+    buckets: Optional[Sequence[tuple]] = None,
+) -> dict:
+    """
+    Compiles ahead of time the pure component kernels ("den" or "vp") of each
+    variant the way production calls them, so later calls of the same shapes
+    do not compile: "backends" through `batch_pure_dispatch` as `backends`
+    does, and "bridge" through `torch_bridge.batch_prop_from_tensor`, forward
+    and backward, as the training loss does. Each target runs its shape
+    buckets of `SHAPE_BUCKETS`, or `buckets` when given, with masked states.
+    With the compilation cache enabled, later processes load them from disk.
+
+    Returns
+    -------
+    dict
+        Warm-up time in s by (target, kernel, variant, bucket).
+    """
+    warmup_fns = {"backends": _warmup_backends, "bridge": _warmup_bridge}
+    times = {}
+    for target in targets:
+        for kernel in kernels:
+            for variant in variants:
+                for num_mol, num_states in buckets or SHAPE_BUCKETS[target]:
+                    para = onp.tile(PURE_VARIANTS[variant][:NUM_PARA], (num_mol, 1))
+                    start = time.perf_counter()
+                    warmup_fns[target](kernel, para, num_states)
+                    times[target, kernel, variant, (num_mol, num_states)] = (
+                        time.perf_counter() - start
+                    )
+                    logging.info(
+                        f"compiled {target} {kernel} {variant} {num_mol}x{num_states}"
+                    )
+    return times
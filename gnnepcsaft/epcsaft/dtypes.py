@@ -0,0 +1,44 @@
+"""Module for the floating point precision of the ePC-SAFT JAX kernels.
+
+`float64` is the reference precision, `float32` the one for throughput.
+The precision is set per process with `set_precision` or per call with
+`cast_precision` (or the `precision` argument of `batch_pure_dispatch`).
+See `precision` for the deviations of each precision from feos.
+"""
+
+from typing import Optional
+
+import jax
+import jax.numpy as jnp
+
+PRECISIONS = {"float64": jnp.float64, "float32": jnp.float32}
+
+
+def set_precision(precision: str):
+    """
+    Sets the precision of the JAX kernels for this process.
+    Must be called before any JAX array is created.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision is one of {list(PRECISIONS)}, got {precision}")
+    jax.config.update("jax_enable_x64", precision == "float64")
+
+
+def default_precision() -> str:
+    "Precision of the JAX kernels for this process."
+    return "float64" if jax.config.read("jax_enable_x64") else "float32"
+
+
+def cast_precision(precision: Optional[str], *arrays) -> tuple:
+    """
+    Casts floating point `arrays` to `precision`, or to the precision
+    of the process when `precision` is None. The kernels compute in the
+    precision of their inputs, so this selects the precision of one call.
+    float64 needs x64 enabled, see `set_precision`.
+    """
+    precision = precision or default_precision()
+    if precision not in PRECISIONS:
+        raise ValueError(f"precision is one of {list(PRECISIONS)}, got {precision}")
+    if precision == "float64" and not jax.config.read("jax_enable_x64"):
+        raise ValueError("float64 needs x64 enabled, call `set_precision('float64')`")
+    return tuple(jnp.asarray(array, dtype=PRECISIONS[precision]) for array in arrays)
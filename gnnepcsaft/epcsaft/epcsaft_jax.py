@@ -16,6 +16,11 @@ PERM_VAC = 8.854187817  # permittivity in vacuum, C V^-1 Angstrom^-1 / 1e-22
 E_CHRG_P10 = 1e-19
 PERM_VAC_P10 = 1e-22
 
+# `params` keys of each optional contribution to the residual Helmholtz energy
+POLAR_KEYS = ("dipm", "dip_num")
+ASSOC_KEYS = ("e_assoc", "vol_a", "khb_ij")
+ION_KEYS = ("z", "dielc")
+
 
 # pylint: disable=R0914
 @jax.jit
@@ -71,20 +76,18 @@ def pcsaft_ares(x, t, rho, params):
     -------
     ares : float
         Residual Helmholtz energy (J mol^{-1})
+
+    The dipole, association and ion terms are only computed when all of
+    their parameters (`POLAR_KEYS`, `ASSOC_KEYS`, `ION_KEYS`) are in `params`.
+    Since `params` is a pytree, each key pattern gets its own compiled kernel.
     """
     m = params["m"]
     s = params["s"]
     e = params["e"]
     k_ij = params["k_ij"]
-    khb_ij = params["khb_ij"]
     l_ij = params["l_ij"]
-    e_assoc = params["e_assoc"]
-    vol_a = params["vol_a"]
-    dipm = params["dipm"]
-    dip_num = params["dip_num"]
-    z = params["z"]
-    dielc = params["dielc"]
     ncomp = x.shape[0]  # number of components
+    dtype = np.result_type(x, t, rho, s)  # coefficients follow the input precision
 
     d = s * (1.0 - 0.12 * np.exp(-3 * e / t))
 
@@ -99,7 +102,8 @@ def pcsaft_ares(x, t, rho, params):
             97.75920878,
             -159.5915409,
             91.29777408,
-        ]
+        ],
+        dtype=dtype,
     )
     a1 = np.asarray(
         [
@@ -110,7 +114,8 @@ def pcsaft_ares(x, t, rho, params):
             -65.25588533,
             83.31868048,
             -33.74692293,
-        ]
+        ],
+        dtype=dtype,
     )
     a2 = np.asarray(
         [
@@ -121,7 +126,8 @@ def pcsaft_ares(x, t, rho, params):
             -4.130211253,
             13.77663187,
             -8.672847037,
-        ]
+        ],
+        dtype=dtype,
     )
     b0 = np.asarray(
         [
@@ -132,7 +138,8 @@ def pcsaft_ares(x, t, rho, params):
             26.85564136,
             206.5513384,
             -355.6023561,
-        ]
+        ],
+        dtype=dtype,
     )
     b1 = np.asarray(
         [
@@ -143,7 +150,8 @@ def pcsaft_ares(x, t, rho, params):
             192.6722645,
             -161.8264617,
             -165.2076935,
-        ]
+        ],
+        dtype=dtype,
     )
     b2 = np.asarray(
         [
@@ -154,7 +162,8 @@ def pcsaft_ares(x, t, rho, params):
             -38.80443005,
             93.62677408,
             -29.66690559,
-        ]
+        ],
+        dtype=dtype,
     )
 
     n = np.arange(4)[..., np.newaxis]
@@ -214,17 +223,26 @@ def pcsaft_ares(x, t, rho, params):
 
     s_ij_diag = np.diagonal(s_ij)[..., np.newaxis]
 
-    polar_params = (m, s, e, dipm, dip_num, e_ij, s_ij, eta)
-    assoc_params = (e_assoc, vol_a, khb_ij, s_ij_diag, s_ij, ghs, ncomp)
-    ion_params = (s, z, dielc)
-
-    ares = (
-        ares_hc
-        + ares_disp
-        + ares_polar(x, t, den, polar_params)
-        + ares_assoc(x, t, den, assoc_params)
-        + ares_ion(x, t, den, ion_params)
-    )
+    ares = ares_hc + ares_disp
+
+    # terms whose parameters are left out of `params` are skipped at trace time
+    if all(key in params for key in POLAR_KEYS):
+        polar_params = (m, s, e, params["dipm"], params["dip_num"], e_ij, s_ij, eta)
+        ares = ares + ares_polar(x, t, den, polar_params)
+    if all(key in params for key in ASSOC_KEYS):
+        assoc_params = (
+            params["e_assoc"],
+            params["vol_a"],
+            params["khb_ij"],
+            s_ij_diag,
+            s_ij,
+            ghs,
+            ncomp,
+        )
+        ares = ares + ares_assoc(x, t, den, assoc_params)
+    if all(key in params for key in ION_KEYS):
+        ion_params = (s, params["z"], params["dielc"])
+        ares = ares + ares_ion(x, t, den, ion_params)
 
     return ares.squeeze()
 
@@ -249,33 +267,34 @@ def ares_polar(x, t, den, params):
     #  nº 12 (1º de dezembro de 2014): 2884–97. https://doi.org/10.1016/j.cherd.2014.05.017.
 
     m, s, e, dipm, dip_num, e_ij, s_ij, eta = params
-
-    a0dip = np.asarray([0.3043504, -0.1358588, 1.4493329, 0.3556977, -2.0653308])[
-        ..., np.newaxis, np.newaxis
-    ]
-    a1dip = np.asarray([0.9534641, -1.8396383, 2.0131180, -7.3724958, 8.2374135])[
-        ..., np.newaxis, np.newaxis
-    ]
-    a2dip = np.asarray([-1.1610080, 4.5258607, 0.9751222, -12.281038, 5.9397575])[
+    dtype = eta.dtype
+
+    a0dip = np.asarray(
+        [0.3043504, -0.1358588, 1.4493329, 0.3556977, -2.0653308], dtype=dtype
+    )[..., np.newaxis, np.newaxis]
+    a1dip = np.asarray(
+        [0.9534641, -1.8396383, 2.0131180, -7.3724958, 8.2374135], dtype=dtype
+    )[..., np.newaxis, np.newaxis]
+    a2dip = np.asarray(
+        [-1.1610080, 4.5258607, 0.9751222, -12.281038, 5.9397575], dtype=dtype
+    )[..., np.newaxis, np.newaxis]
+    b0dip = np.asarray([0.2187939, -1.1896431, 1.1626889, 0, 0.0], dtype=dtype)[
         ..., np.newaxis, np.newaxis
     ]
-    b0dip = np.asarray([0.2187939, -1.1896431, 1.1626889, 0, 0.0])[
+    b1dip = np.asarray([-0.5873164, 1.2489132, -0.5085280, 0, 0], dtype=dtype)[
         ..., np.newaxis, np.newaxis
     ]
-    b1dip = np.asarray([-0.5873164, 1.2489132, -0.5085280, 0, 0])[
-        ..., np.newaxis, np.newaxis
-    ]
-    b2dip = np.asarray([3.4869576, -14.915974, 15.372022, 0, 0])[
+    b2dip = np.asarray([3.4869576, -14.915974, 15.372022, 0, 0], dtype=dtype)[
         ..., np.newaxis, np.newaxis
     ]
 
-    c0dip = np.asarray([-0.0646774, 0.1975882, -0.8087562, 0.6902849, 0])[
+    c0dip = np.asarray([-0.0646774, 0.1975882, -0.8087562, 0.6902849, 0], dtype=dtype)[
         ..., np.newaxis, np.newaxis, np.newaxis
     ]
-    c1dip = np.asarray([-0.9520876, 2.9924258, -2.3802636, -0.2701261, 0])[
+    c1dip = np.asarray([-0.9520876, 2.9924258, -2.3802636, -0.2701261, 0], dtype=dtype)[
         ..., np.newaxis, np.newaxis, np.newaxis
     ]
-    c2dip = np.asarray([-0.6260979, 1.2924686, 1.6542783, -3.4396744, 0])[
+    c2dip = np.asarray([-0.6260979, 1.2924686, 1.6542783, -3.4396744, 0], dtype=dtype)[
         ..., np.newaxis, np.newaxis, np.newaxis
     ]
 
@@ -350,11 +369,23 @@ def ares_polar(x, t, den, params):
     return jax.lax.cond(
         np.any(jax.lax.is_finite(ares_polar_term)),
         lambda ares_polar_term: ares_polar_term,
-        np.zeros_like(ares_polar_term),
+        np.zeros_like,
         ares_polar_term,
     )
 
 
+def dtype_tol(tol, value):
+    """
+    Solver tolerance `tol`, raised to a few machine epsilons of the dtype
+    of `value` when that is coarser, e.g. for float32.
+    """
+    return max(tol, 64 * float(np.finfo(np.result_type(value)).eps))
+
+
+XA_TOL = 1.0e-12  # tolerance of the Newton solver for XA
+XA_MAXITER = 50
+
+
 # pylint: disable=invalid-name
 def ares_assoc(x, t, den, params):
     "Association term for ePC-SAFT."
@@ -362,6 +393,21 @@ def ares_assoc(x, t, den, params):
     # Association term -------------------------------------------------------
     # 2B association type
 
+    e_assoc, vol_a, *_ = params
+
+    return jax.lax.cond(
+        np.all((e_assoc == 0) | (vol_a == 0)),
+        lambda x, t, den: np.zeros_like(den),
+        lambda x, t, den: _ares_assoc(x, t, den, params),
+        x,
+        t,
+        den,
+    )
+
+
+def _ares_assoc(x, t, den, params):
+    "Association term for ePC-SAFT of associating systems."
+
     e_assoc, vol_a, khb_ij, s_ij_diag, s_ij, ghs, ncomp = params
 
     eABij = (e_assoc + e_assoc.T) / 2.0 * (1 - khb_ij)
@@ -374,26 +420,83 @@ def ares_assoc(x, t, den, params):
 
     delta_ij = ghs * volABij * s_ij**3 * (np.exp(eABij / t) - 1.0)
 
+    if ncomp == 1:
+        XA = xa_pure(delta_ij, den)
+    else:
+        XA = xa_newton(delta_ij, den, x)
+
+    ares_assoc_term = np.sum(x * (np.log(XA) - XA / 2.0 + 1 / 2.0))
+
+    return jax.lax.cond(
+        np.any(jax.lax.is_finite(ares_assoc_term)),
+        lambda ares_assoc_term: ares_assoc_term,
+        np.zeros_like,
+        ares_assoc_term,
+    )
+
+
+def xa_pure(delta_ij, den):
+    """
+    Analytic XA of a pure 2B component, root of den * delta * XA**2 + XA - 1 = 0
+    written in a form that is stable for small `den * delta`.
+    """
+    return (
+        np.ones((1, 2), delta_ij.dtype)
+        * 2.0
+        / (1.0 + np.sqrt(1.0 + 4.0 * den * delta_ij))
+    )
+
+
+def xa_residual(XA, delta_ij, den, x):
+    "Residual of the mass action law for XA, zero at the solution."
+    return XA - xa_find(XA, delta_ij, den, x)
+
+
+@jax.custom_jvp
+def xa_newton(delta_ij, den, x):
+    """
+    XA of a mixture by Newton's method on `XA - xa_find(XA)`,
+    stopping at `XA_TOL` or after `XA_MAXITER` iterations.
+    Derivatives are taken implicitly from the converged XA (`_xa_newton_jvp`),
+    so reverse-mode differentiation does not go through the while loop.
+    """
     delta_ij_diag = np.diagonal(delta_ij)[..., np.newaxis] + 1e-30
 
     XA = (
-        np.ones((ncomp, 2))
+        np.ones((x.shape[0], 2), delta_ij.dtype)
         * (-1 + np.sqrt(1 + 8 * den * delta_ij_diag))
         / (4 * den * delta_ij_diag)
     )
 
-    XA = jax.lax.fori_loop(
-        0, 50, lambda i, XA: (XA + xa_find(XA, delta_ij, den, x)) / 2.0, XA
-    )
+    def residual(XA):
+        return xa_residual(XA, delta_ij, den, x)
 
-    ares_assoc_term = np.sum(x * (np.log(XA) - XA / 2.0 + 1 / 2.0))
+    def cond_fn(carry):
+        _, res, i = carry
+        return (np.max(np.abs(res)) > dtype_tol(XA_TOL, XA)) & (i < XA_MAXITER)
 
-    return jax.lax.cond(
-        np.any(jax.lax.is_finite(ares_assoc_term)),
-        lambda ares_assoc_term: ares_assoc_term,
-        np.zeros_like(ares_assoc_term),
-        ares_assoc_term,
+    def body_fn(carry):
+        XA, res, i = carry
+        jac = jax.jacfwd(residual)(XA).reshape(XA.size, XA.size)
+        step = np.linalg.solve(jac, res.reshape(-1)).reshape(XA.shape)
+        XA = np.clip(XA - step, 1.0e-12, 1.0)
+        return XA, residual(XA), i + 1
+
+    XA, _, _ = jax.lax.while_loop(cond_fn, body_fn, (XA, residual(XA), 0))
+
+    return XA
+
+
+@xa_newton.defjvp
+def _xa_newton_jvp(primals, tangents):
+    "Implicit derivative of XA, solving d(residual) = 0 for the XA tangent."
+    XA = xa_newton(*primals)
+    _, dres = jax.jvp(
+        lambda delta_ij, den, x: xa_residual(XA, delta_ij, den, x), primals, tangents
     )
+    jac = jax.jacfwd(xa_residual)(XA, *primals).reshape(XA.size, XA.size)
+    dXA = np.linalg.solve(jac, -dres.reshape(-1)).reshape(XA.shape)
+    return XA, dXA
 
 
 def ares_ion(x, t, den, params):
@@ -433,6 +536,6 @@ def ares_ion(x, t, den, params):
     return jax.lax.cond(
         np.any(jax.lax.is_finite(ares_ion_term)),
         lambda ares_ion_term: ares_ion_term,
-        np.zeros_like(ares_ion_term),
+        np.zeros_like,
         ares_ion_term,
     )
@@ -0,0 +1,193 @@
+"""ePC-SAFT mixture properties with jax
+---------------
+Density, bubble and dew pressure of mixtures, vectorized over compositions.
+"""
+
+# @author: Wildson Lima
+
+from functools import partial
+from typing import NamedTuple
+
+import jax
+import jax.numpy as np
+
+from .epcsaft_jax import dtype_tol
+from .epcsaftprops_jax import pcsaft_den, pcsaft_fugcoef
+from .epcsaftpure_jax import pcsaft_sat
+
+MIX_TOL = 1.0e-10  # tolerance of the isofugacity solver
+MIX_MAXITER = 100
+MIX_MAX_STEP = 1.0  # largest Newton step in ln p
+
+
+class MixSatResult(NamedTuple):
+    "Phase equilibrium of a mixture at bubble or dew point."
+
+    p: jax.Array  # pressure (Pa)
+    x: jax.Array  # liquid mole fractions, shape (n,)
+    y: jax.Array  # vapor mole fractions, shape (n,)
+    rho_l: jax.Array  # liquid molar density (mol / m^3)
+    rho_v: jax.Array  # vapor molar density (mol / m^3)
+    converged: jax.Array
+
+
+def component_params(params, i):
+    "Pure component `params` of component `i` of a mixture."
+    # (n, 1) component parameters and (n, n) binary interaction parameters
+    return {
+        key: value[i : i + 1, i : i + 1] if value.shape[1] > 1 else value[i : i + 1]
+        for key, value in params.items()
+    }
+
+
+def pure_vps(t, params):
+    """
+    Vapor pressures (Pa) at `t` (K) of every component of a mixture,
+    from `pcsaft_sat`. Components above their critical temperature get
+    the pressure of the unconverged solver, a rough guess only.
+    """
+    ncomp = params["m"].shape[0]
+    return np.stack(
+        [
+            pcsaft_sat(
+                np.ones((1, 1), t.dtype), t, 1.0e5, component_params(params, i)
+            ).p
+            for i in range(ncomp)
+        ]
+    )
+
+
+@jax.jit
+def pcsaft_den_mix(x, t, p, phase, params):
+    """
+    Molar density (mol / m^3) of a mixture with mole fractions `x`, shape (n,),
+    at temperature `t` (K) and pressure `p` (Pa), see `pcsaft_den`.
+    """
+    return pcsaft_den(x[..., np.newaxis], t, p, phase, params)
+
+
+def _k_values(ln_p, x, y, t, params):
+    "Equilibrium ratios phi_l / phi_v and phase densities at pressure exp(ln_p)."
+    p = np.exp(ln_p)
+    rho_l = pcsaft_den(x[..., np.newaxis], t, p, 1.0, params)
+    rho_v = pcsaft_den(y[..., np.newaxis], t, p, 0.0, params)
+    fugcoef_l = pcsaft_fugcoef(x[..., np.newaxis], t, rho_l, params)
+    fugcoef_v = pcsaft_fugcoef(y[..., np.newaxis], t, rho_v, params)
+    return fugcoef_l / fugcoef_v, (rho_l, rho_v)
+
+
+# pylint: disable=R0914
+@partial(jax.jit, static_argnames="dew")
+def isofugacity_solve(z, t, params, dew=False):
+    """
+    Bubble (`dew` False) or dew (`dew` True) point pressure of a mixture
+    with feed mole fractions `z`, shape (n,), at temperature `t` (K).
+
+    The pressure is solved by Newton's method on ln p for the sum of the
+    incipient phase mole fractions, ln(sum(K z)) = 0 at the bubble point
+    and ln(sum(z / K)) = 0 at the dew point, with the derivative taken by
+    forward-mode differentiation through the density solver. The incipient
+    phase composition is updated by successive substitution. Raoult's law
+    with the pure component vapor pressures gives the initial guess.
+    The solver stops at `MIX_TOL` or after `MIX_MAXITER` iterations,
+    and the result is flagged as not converged when it collapses into
+    a single phase.
+
+    Returns
+    -------
+    MixSatResult
+    """
+    psat = pure_vps(t, params)
+    if dew:
+        p = 1.0 / np.sum(z / psat)
+        w = z * p / psat
+    else:
+        p = np.sum(z * psat)
+        w = z * psat / p
+
+    tol = dtype_tol(MIX_TOL, p)
+
+    def phases(w):
+        return (w, z) if dew else (z, w)
+
+    def residual(ln_p, w):
+        x, y = phases(w)
+        k, rho = _k_values(ln_p, x, y, t, params)
+        w_new = z / k if dew else z * k
+        return np.log(np.sum(w_new)), (w_new / np.sum(w_new), rho)
+
+    def cond_fn(carry):
+        _, _, err, _, i = carry
+        return (err > tol) & (i < MIX_MAXITER)
+
+    def body_fn(carry):
+        ln_p, w, _, _, i = carry
+        f, df, (w_new, rho) = jax.jvp(
+            lambda ln_p: residual(ln_p, w), (ln_p,), (np.ones_like(ln_p),), has_aux=True
+        )
+        step = np.clip(f / df, -MIX_MAX_STEP, MIX_MAX_STEP)
+        err = np.maximum(np.abs(f), np.max(np.abs(w_new - w)))
+        return ln_p - step, w_new, err, rho, i + 1
+
+    rho = (np.zeros_like(p), np.zeros_like(p))
+    ln_p, w, err, (rho_l, rho_v), _ = jax.lax.while_loop(
+        cond_fn, body_fn, (np.log(p), w, np.inf, rho, 0)
+    )
+
+    x, y = phases(w)
+    converged = (err <= tol) & (np.abs(np.log(rho_l / rho_v)) > 1.0e-3)
+
+    return MixSatResult(np.exp(ln_p), x, y, rho_l, rho_v, converged)
+
+
+@jax.jit
+def pcsaft_bubble_p(x, t, params):
+    "Bubble point of a liquid with mole fractions `x` at `t` (K), see `isofugacity_solve`."
+    return isofugacity_solve(x, t, params, dew=False)
+
+
+@jax.jit
+def pcsaft_dew_p(y, t, params):
+    "Dew point of a vapor with mole fractions `y` at `t` (K), see `isofugacity_solve`."
+    return isofugacity_solve(y, t, params, dew=True)
+
+
+den_compositions = jax.jit(
+    jax.vmap(
+        pcsaft_den_mix,
+        (
+            0,
+            None,
+            None,
+            None,
+            None,
+        ),
+    )
+)
+
+bubble_compositions = jax.jit(jax.vmap(pcsaft_bubble_p, (0, None, None)))
+
+dew_compositions = jax.jit(jax.vmap(pcsaft_dew_p, (0, None, None)))
+
+
+@jax.jit
+def pxy_diagram(x1, t, params):
+    """
+    Isothermal Pxy diagram of a binary mixture at `t` (K) in one call.
+
+    Parameters
+    ----------
+    x1 : ndarray, shape (N,)
+        Liquid mole fractions of the first component.
+    t : float
+        Temperature (K)
+    params : dict
+        ePC-SAFT parameters of the binary mixture, see `pcsaft_ares`.
+
+    Returns
+    -------
+    MixSatResult
+        Bubble points, with arrays of shape (N,) and (N, 2).
+    """
+    x = np.stack([x1, 1.0 - x1], axis=-1)
+    return bubble_compositions(x, t, params)
@@ -6,13 +6,17 @@ Code reference: `https://github.com/zmeri/PC-SAFT`
 # @author: Wildson Lima
 
 
+from typing import NamedTuple
+
 import jax
 import jax.numpy as np
+import numpy as onp
 
-from .epcsaft_jax import pcsaft_ares
+from .epcsaft_jax import dtype_tol, pcsaft_ares
+from .status import SolverStatus
 
 # pylint: disable=C0103,E1102
-dares_drho = jax.jit(jax.jacfwd(pcsaft_ares, 5))
+dares_drho = jax.jit(jax.jacfwd(pcsaft_ares, 2))
 
 
 # pylint: disable = invalid-name
@@ -253,14 +257,142 @@ def den_err(nu, x, t, p, params):
     return (P_fit - p) / p
 
 
+# Coarse reduced density grid used to bracket the density roots
+NU_SCAN = onp.concatenate(
+    [
+        10 ** -onp.arange(13.0, 2.0, -1),
+        onp.arange(2.0e-3, 0.7405, 0.01),
+        onp.asarray([0.7405]),
+    ]
+)
+
+
+def nu_scan(dtype):
+    """
+    `NU_SCAN` in `dtype`, raised where the hard-sphere term would underflow
+    (below about 1e-9 in float32).
+    """
+    return np.maximum(NU_SCAN.astype(dtype), 1.0e4 * np.finfo(dtype).tiny ** (1 / 3))
+
+
+DEN_TOL = 1.0e-10  # relative pressure tolerance of the density solver
+DEN_MAXITER = 50
+
+dden_err_dnu = jax.jit(jax.value_and_grad(den_err))
+
+
+# pylint: disable=R0913,R0917
 @jax.jit
-def den_errSQ(nu, x, t, p, params):
-    """Find root of this function to calculate the reduced density or pressure."""
+def den_solve(nu_a, nu_b, x, t, p, params):
+    """
+    Safeguarded Newton solver for the reduced density root of `den_err`
+    in the bracket [nu_a, nu_b]. Newton steps that leave the bracket are
+    replaced by bisection, and the loop stops at `DEN_TOL` or when the steps
+    reach the machine precision of `nu`.
+
+    Returns
+    -------
+    nu : float
+        Reduced density
+    converged : bool
+        Whether the tolerance was reached within `DEN_MAXITER` iterations.
+    """
+
+    f_a = den_err(nu_a, x, t, p, params)
+    nu = (nu_a + nu_b) / 2.0
+    f, df = dden_err_dnu(nu, x, t, p, params)
+    tol = dtype_tol(DEN_TOL, nu)
+    # relative change of nu below which the solver is at machine precision
+    eps = 4 * np.finfo(nu.dtype).eps
+
+    def cond_fn(carry):
+        nu_a, nu_b, _, nu, f, _, step, i = carry
+        return (
+            (np.abs(f) > tol)
+            & (np.abs(nu_b - nu_a) > eps * nu)
+            & (np.abs(step) > eps * nu)
+            & (i < DEN_MAXITER)
+        )
+
+    def body_fn(carry):
+        nu_a, nu_b, f_a, nu_old, f, df, _, i = carry
+        # shrink the bracket with the current iterate before stepping
+        same_sign = f * f_a > 0
+        nu_a = np.where(same_sign, nu_old, nu_a)
+        f_a = np.where(same_sign, f, f_a)
+        nu_b = np.where(same_sign, nu_b, nu_old)
+        nu_newton = nu_old - f / df
+        in_bracket = (
+            (nu_newton > np.minimum(nu_a, nu_b))
+            & (nu_newton < np.maximum(nu_a, nu_b))
+            & np.isfinite(nu_newton)
+        )
+        nu = np.where(in_bracket, nu_newton, (nu_a + nu_b) / 2.0)
+        f, df = dden_err_dnu(nu, x, t, p, params)
+        return nu_a, nu_b, f_a, nu, f, df, nu - nu_old, i + 1
+
+    _, _, _, nu, f, _, step, _ = jax.lax.while_loop(
+        cond_fn, body_fn, (nu_a, nu_b, f_a, nu, f, df, nu, 0)
+    )
+
+    return nu, (np.abs(f) <= tol) | (np.abs(step) <= eps * nu)
+
 
-    return den_err(nu, x, t, p, params) ** 2
+def den_bracket(x, t, p, phase, params):
+    """
+    Reduced density bracket of the liquid (`phase` = 1) or vapor (`phase` = 0) root
+    from a coarse scan of `den_err` over `NU_SCAN`, and whether the scan found
+    a sign change. Without one, the bracket is the point closest to a root.
+    """
+    nu = nu_scan(np.result_type(t, float))
+    err = vden_err(nu, x, t, p, params)
+
+    idx = np.arange(nu.shape[0] - 1)
+    sign_change = err[1:] * err[:-1] < 0
+    idx_liq = np.max(np.where(sign_change, idx, 0))
+    idx_vap = np.min(np.where(sign_change, idx, nu.shape[0] - 2))
+    # without sign change, bracket the point closest to a root
+    idx_close = np.clip(np.nanargmin(np.abs(err)), 1, nu.shape[0] - 2) - 1
+    i = np.where(phase == 1, idx_liq, idx_vap)
+    bracketed = np.any(sign_change)
+    i = np.where(bracketed, i, idx_close)
 
+    return nu[i], nu[i + 1], bracketed
 
-dden_errSQ_dnu = jax.jit(jax.jacfwd(den_errSQ))
+
+class DenResult(NamedTuple):
+    "Density of one phase and the outcome of the solver."
+
+    rho: jax.Array  # molar density (mol / m^3)
+    converged: jax.Array
+    status: jax.Array  # `SolverStatus` code
+
+
+@jax.jit
+def pcsaft_den_result(x, t, p, phase, params):
+    """
+    Molar density at temperature and pressure given, see `pcsaft_den`,
+    with the outcome of the solver. The result is flagged as not converged
+    when the scan of `den_bracket` finds no root (`NO_ROOT`), when
+    `den_solve` does not reach the tolerance within the bracket (`MAX_ITER`)
+    or when the density is not finite.
+
+    Returns
+    -------
+    DenResult
+        Molar density (mol / m^3), convergence flag and `SolverStatus` code.
+    """
+    nu_a, nu_b, bracketed = den_bracket(x, t, p, phase, params)
+    nu, solved = den_solve(nu_a, nu_b, x, t, p, params)
+    rho = density_from_nu(nu, t, x, params).squeeze()
+
+    converged = bracketed & solved & np.isfinite(rho)
+    status = np.select(
+        [converged, bracketed & ~solved],
+        [SolverStatus.CONVERGED, SolverStatus.MAX_ITER],
+        SolverStatus.NO_ROOT,
+    )
+    return DenResult(rho, converged, status)
 
 
 @jax.jit
@@ -319,74 +451,15 @@ def pcsaft_den(x, t, p, phase, params):
     -------
     rho : float
         Molar density (mol / m^3)
-    """
-
-    nulow = (
-        10
-        ** -np.arange(
-            13.0,
-            4.0,
-            -1,
-        )[..., np.newaxis]
-    )
-    nuhigh = np.arange(
-        1.0e-4,
-        0.7405,
-        0.0001,
-    )[..., np.newaxis]
-    nu = np.concatenate([nulow, nuhigh], 0)
-
-    err = vden_err(nu, x, t, p, params)
-
-    nul = np.zeros_like(nu).repeat(3, 1) * np.nan
-
-    nul = jax.lax.fori_loop(
-        0,
-        nul.shape[0] - 1,
-        lambda i, nul: jax.lax.cond(
-            err[i + 1] * err[i] < 0,
-            lambda i, nul: nul.at[i, :].set((nu[i, 0], nu[i + 1, 0], 1)),
-            lambda i, nul: nul.at[i, :].set((np.nan, np.nan, 0)),
-            i,
-            nul,
-        ),
-        nul,
-    )
-
-    nu_max = np.nanargmax(nul, 0)[0]
-    nu_min = np.nanargmin(nul, 0)[0]
 
-    nu_max, nu_min = jax.lax.cond(
-        phase == 1,
-        lambda nul: nul[nu_max, 0:2],
-        lambda nul: nul[nu_min, 0:2],
-        nul,
-    )
-
-    nu = (nu_max + nu_min) / 2.0
-
-    # pylint: disable = unused-argument
-    def updater(i, nu):
-        f = den_errSQ(nu, x, t, p, params)
-
-        gradf = jax.lax.cond(
-            f < 1.0e-5,
-            lambda nu: np.inf,
-            lambda nu: dden_errSQ_dnu(nu, x, t, p, params),
-            nu,
-        )
-
-        tmp = nu - f / gradf
-        nu = jax.lax.cond(
-            np.any((tmp > 0) & (jax.lax.is_finite(tmp))),
-            lambda nu: tmp,
-            lambda nu: nu,
-            nu,
-        )
-
-        return nu
+    Roots are bracketed with a coarse scan of the reduced density (`NU_SCAN`):
+    the liquid root is the one in the highest bracket with a sign change,
+    the vapor root the one in the lowest. The root is then polished with
+    `den_solve`. See `pcsaft_den_result` for the outcome of the solver.
+    """
 
-    nu = jax.lax.fori_loop(0, 20, updater, nu)
+    nu_a, nu_b, _ = den_bracket(x, t, p, phase, params)
+    nu, _ = den_solve(nu_a, nu_b, x, t, p, params)
 
     rho = density_from_nu(nu, t, x, params)
 
@@ -401,6 +474,7 @@ vden_err = jax.jit(
             None,
             None,
             None,
+            None,
         ),
     )
 )
@@ -620,6 +694,163 @@ def pcsaft_sres(x, t, rho, params):
     return ((hres - gres) / t).squeeze()
 
 
+class ResProps(NamedTuple):
+    "Residual properties of one phase, see `pcsaft_props`."
+
+    ares: jax.Array  # residual Helmholtz energy over RT
+    Z: jax.Array  # compressibility factor
+    p: jax.Array  # pressure (Pa)
+    fugcoef: jax.Array  # fugacity coefficients, shape (n,)
+    hres: jax.Array  # residual enthalpy (J mol^-1)
+    sres: jax.Array  # residual entropy (J mol^-1 K^-1)
+    gres: jax.Array  # residual Gibbs energy (J mol^-1)
+
+
+def _ares_aux(x, t, rho, params):
+    ares = pcsaft_ares(x, t, rho, params)
+    return ares, ares
+
+
+# pylint: disable=R0914
+@jax.jit
+def pcsaft_props(x, t, rho, params):
+    """
+    Residual properties of one phase from a single evaluation of `pcsaft_ares`
+    and its derivatives in x, t and rho, in one forward-mode pass.
+    Same results as `pcsaft_Z`, `pcsaft_p`, `pcsaft_fugcoef`, `pcsaft_hres`,
+    `pcsaft_sres` and `pcsaft_gres`, which each evaluate `pcsaft_ares` again.
+
+    Parameters
+    ----------
+    x : ndarray, shape (n,1)
+        Mole fractions of each component.
+    t : float
+        Temperature (K)
+    rho : float
+        Molar density (mol / m^3)
+    params : dict
+        ePC-SAFT parameters, see `pcsaft_ares`.
+
+    Returns
+    -------
+    ResProps
+    """
+
+    kb = 1.380648465952442093e-23  # Boltzmann constant, J K^-1
+    nav = 6.022140857e23  # Avogadro's number
+
+    (dares_x, dares_t, dares_rho), ares = jax.jacfwd(
+        _ares_aux, (0, 1, 2), has_aux=True
+    )(x, t, rho, params)
+
+    Z = 1 + rho * dares_rho
+    lnZ = np.log(Z)
+    p = Z * kb * t * rho * nav
+    fugcoef = np.exp(ares + (Z - 1) + dares_x - (x.T @ dares_x) - lnZ)
+    hres = (-t * dares_t + (Z - 1)) * kb * nav * t
+    gres = (ares + (Z - 1) - lnZ) * kb * nav * t
+
+    return ResProps(
+        ares,
+        Z,
+        p,
+        fugcoef.squeeze(),
+        hres,
+        (hres - gres) / t,
+        gres,
+    )
+
+
+props_states = jax.jit(
+    jax.vmap(
+        pcsaft_props,
+        (
+            None,
+            0,
+            0,
+            None,
+        ),
+    )
+)
+
+
+class DerivProps(NamedTuple):
+    "Second derivative properties of one phase, see `pcsaft_derivs`."
+
+    rho: jax.Array  # molar density (mol / m^3)
+    cv_res: jax.Array  # residual isochoric heat capacity (J mol^-1 K^-1)
+    cp_res: jax.Array  # residual isobaric heat capacity (J mol^-1 K^-1)
+    dp_dt: jax.Array  # (dp/dT) at constant rho (Pa K^-1)
+    dp_drho: jax.Array  # (dp/drho) at constant T (Pa m^3 mol^-1)
+
+
+@jax.jit
+def pcsaft_derivs(x, t, rho, params):
+    """
+    Heat capacities and pressure derivatives of one phase from the
+    first and second derivatives of `pcsaft_ares` in t and rho,
+    with nested forward-mode differentiation.
+
+    Parameters
+    ----------
+    x : ndarray, shape (n,1)
+        Mole fractions of each component.
+    t : float
+        Temperature (K)
+    rho : float
+        Molar density (mol / m^3)
+    params : dict
+        ePC-SAFT parameters, see `pcsaft_ares`.
+
+    Returns
+    -------
+    DerivProps
+    """
+
+    kb = 1.380648465952442093e-23  # Boltzmann constant, J K^-1
+    nav = 6.022140857e23  # Avogadro's number
+    R = kb * nav
+
+    def grad_aux(t, rho):
+        grad = jax.jacfwd(pcsaft_ares, (1, 2))(x, t, rho, params)
+        return grad, grad
+
+    ((a_tt, a_trho), (_, a_rhorho)), (a_t, a_rho) = jax.jacfwd(
+        grad_aux, (0, 1), has_aux=True
+    )(t, rho)
+
+    cv_res = -R * t * (2 * a_t + t * a_tt)
+    dp_dt = rho * R * (1 + rho * a_rho + rho * t * a_trho)
+    dp_drho = R * t * (1 + 2 * rho * a_rho + rho**2 * a_rhorho)
+    cp_res = cv_res + t * dp_dt**2 / (rho**2 * dp_drho) - R
+
+    return DerivProps(rho, cv_res, cp_res, dp_dt, dp_drho)
+
+
+def speed_of_sound(derivs, cp_ig, molar_mass):
+    """
+    Speed of sound (m / s) from the `DerivProps` of a phase, its ideal gas
+    isobaric heat capacity `cp_ig` (J mol^-1 K^-1) and molar mass (kg / mol).
+    """
+    R = 1.380648465952442093e-23 * 6.022140857e23
+    cp = derivs.cp_res + cp_ig
+    cv = derivs.cv_res + cp_ig - R
+    return np.sqrt(cp / cv * derivs.dp_drho / molar_mass)
+
+
+derivs_states = jax.jit(
+    jax.vmap(
+        pcsaft_derivs,
+        (
+            None,
+            0,
+            0,
+            None,
+        ),
+    )
+)
+
+
 den_phase = jax.jit(
     jax.vmap(
         pcsaft_den,
@@ -657,83 +888,6 @@ def k_i(p_guess, x, t, params):
         x,
         t,
         rho,
+        params,
     )
     return fugcoef_l / fugcoef_v
-
-
-@jax.jit
-def pcsaft_VP(x, t, p_guess, params):
-    """
-    Vapor pressure calculation
-
-    x : ndarray, shape (n,1)
-        Mole fractions of each component. It has a length of n, where n is
-        the number of components in the system.
-    m : ndarray, shape (n,1)
-        Segment number for each component.
-    s : ndarray, shape (n,1)
-        Segment diameter for each component. For ions this is the diameter of
-        the hydrated ion. Units of Angstrom.
-    e : ndarray, shape (n,1)
-        Dispersion energy of each component. For ions this is the dispersion
-        energy of the hydrated ion. Units of K.
-    t : float
-        Temperature (K)
-    k_ij : ndarray, shape (n,n)
-        Binary interaction parameters between components in the mixture for dispersion energy.
-        (dimensions: ncomp x ncomp)
-    l_ij : ndarray, shape (n,n)
-        Binary interaction parameters between components in the mixture for segment diameter.
-        (dimensions: ncomp x ncomp)
-    khb_ij : ndarray, shape (n,n)
-        Binary interaction parameters between components in the mixture for association energy.
-        (dimensions: ncomp x ncomp)
-    e_assoc : ndarray, shape (n,1)
-        Association energy of the associating components. For non associating
-        compounds this is set to 0. Units of K.
-    vol_a : ndarray, shape (n,1)
-        Effective association volume of the associating components. For non
-        associating compounds this is set to 0.
-    dipm : ndarray, shape (n,1)
-        Dipole moment of the polar components. For components where the dipole
-        term is not used this is set to 0. Units of Debye.
-    dip_num : ndarray, shape (n,1)
-        The effective number of dipole functional groups on each component
-        molecule.
-    z : ndarray, shape (n,1)
-        Charge number of the ions
-    dielc : ndarray, shape (n,1)
-        permittivity of each component of the medium to be used for electrolyte
-        calculations.
-
-    Returns
-    -------
-    VP : float
-        Vapor Pressure (Pa)
-    """
-
-    pref = p_guess - 0.01 * p_guess
-
-    pprime = jax.lax.cond(
-        p_guess > 1.0e6,
-        lambda p_guess: p_guess - 0.005 * p_guess,
-        lambda p_guess: p_guess + 0.01 * p_guess,
-        p_guess,
-    )
-
-    k = k_i(p_guess, x, t, params)
-    kprime = k_i(pprime, x, t, params)
-
-    dlnk_dt = (kprime - k) / (pprime - p_guess)
-    wi = x * dlnk_dt / np.sum(x * dlnk_dt)
-
-    kb = np.exp(np.sum(wi * np.log(k)))
-
-    kbprime = np.exp(np.sum(wi * np.log(kprime)))
-
-    B = np.log(kbprime / kb) / (1 / pprime - 1 / p_guess)
-    A = np.log(kb) - B * (1 / p_guess - 1 / pref)
-
-    p = 1.0 / (1.0 / pref + (np.log(1.0) - A) / B)
-
-    return p.squeeze()
@@ -0,0 +1,734 @@
+"""ePC-SAFT pure component properties with jax, batched over molecules and states
+---------------
+Saturation solver, parameter vectors of `epcsaft.utils`, kernel variants and the
+batched density, saturation and derivative properties, with their parameter gradients.
+"""
+
+# @author: Wildson Lima
+
+from functools import partial
+from typing import NamedTuple, Optional
+
+import jax
+import jax.numpy as np
+import numpy as onp
+
+from .dtypes import cast_precision
+from .epcsaft_jax import ASSOC_KEYS, ION_KEYS, POLAR_KEYS, dtype_tol, pcsaft_ares
+from .epcsaftprops_jax import (
+    dares_drho,
+    den_solve,
+    density_from_nu,
+    nu_scan,
+    pcsaft_den,
+    pcsaft_den_result,
+    pcsaft_derivs,
+    pcsaft_hres,
+    pcsaft_p,
+)
+from .sharding import shard_batch
+from .status import SolverStatus
+
+# pylint: disable=C0103,E1102
+SAT_TOL = 1.0e-10  # tolerance of the saturation solver residuals
+SAT_MAXITER = 50
+SAT_MAX_STEP = 0.5  # largest Newton step in the log of the densities
+
+
+class SatResult(NamedTuple):
+    "Saturation state of a pure component."
+
+    p: jax.Array  # vapor pressure (Pa)
+    rho_l: jax.Array  # liquid molar density (mol / m^3)
+    rho_v: jax.Array  # vapor molar density (mol / m^3)
+    converged: jax.Array
+    status: jax.Array  # `SolverStatus` code
+
+
+def sat_residual(ln_rho, x, t, params):
+    """
+    Residuals of pressure and chemical potential equality between
+    liquid and vapor of a pure component at log densities `ln_rho` = (L, V).
+    """
+    rho = np.exp(ln_rho)
+    ares = jax.vmap(pcsaft_ares, (None, None, 0, None))(x, t, rho, params)
+    Z = 1.0 + rho * jax.vmap(dares_drho, (None, None, 0, None))(x, t, rho, params)
+    # residual chemical potential plus the density dependent ideal part, over RT
+    mu = ares + Z - 1.0 + ln_rho
+    return np.stack([(Z[0] * rho[0] - Z[1] * rho[1]) / rho[0], mu[0] - mu[1]])
+
+
+def sat_guess(x, t, p_guess, params):
+    """
+    Liquid and vapor densities at `p_guess` clipped into the pressure range
+    between the spinodals found on a `NU_SCAN` isotherm, so that both roots exist.
+    """
+    nu = nu_scan(np.result_type(t, float))
+    rho = density_from_nu(nu, t, x, params)
+    p = jax.vmap(pcsaft_p, (None, None, 0, None))(x, t, rho, params)
+
+    idx = np.arange(nu.shape[0] - 1)
+    falling = p[1:] < p[:-1]
+    i_max = np.min(np.where(falling, idx, nu.shape[0] - 2))  # vapor spinodal
+    i_min = np.max(np.where(falling, idx, 0)) + 1  # liquid spinodal
+    # keep away from the spinodals, where the Newton solver drifts to the
+    # trivial solution; the lower bound only matters near the critical point
+    p_lo = np.where(p[i_min] > 0, p[i_min], -np.inf)
+    margin = 0.1 * (p[i_max] - np.maximum(p[i_min], 0.0))
+    p_guess = np.clip(p_guess, p_lo + margin, p[i_max] - margin)
+
+    nu_l, _ = den_solve(nu[i_min], nu[-1], x, t, p_guess, params)
+    nu_v, _ = den_solve(nu[0], nu[i_max], x, t, p_guess, params)
+
+    return density_from_nu(np.stack([nu_l, nu_v]), t, x, params)
+
+
+# pylint: disable=R0914
+@jax.jit
+def pcsaft_sat(x, t, p_guess, params):
+    """
+    Saturation state of a pure component at temperature `t` (K).
+
+    The liquid and vapor densities at `p_guess` (Pa), see `sat_guess`,
+    are the initial guess of a Newton solver on the log of both densities,
+    with steps limited to `SAT_MAX_STEP`. It stops when the residuals or the
+    steps reach `SAT_TOL`, or after `SAT_MAXITER` iterations.
+    The result is flagged as not converged when the solver does not reach
+    the tolerance or when both densities collapse into the trivial solution,
+    e.g. above the critical temperature.
+
+    Returns
+    -------
+    SatResult
+        Vapor pressure (Pa), liquid and vapor densities (mol / m^3),
+        convergence flag and `SolverStatus` code.
+    """
+    ln_rho = np.log(sat_guess(x, t, p_guess, params))
+    res = sat_residual(ln_rho, x, t, params)
+    tol = dtype_tol(SAT_TOL, ln_rho)
+
+    def cond_fn(carry):
+        _, res, step, i = carry
+        return (
+            (np.max(np.abs(res)) > tol)
+            & (np.max(np.abs(step)) > tol)
+            & (i < SAT_MAXITER)
+        )
+
+    def body_fn(carry):
+        ln_rho, res, _, i = carry
+        jac = jax.jacfwd(sat_residual)(ln_rho, x, t, params)
+        step = np.clip(np.linalg.solve(jac, res), -SAT_MAX_STEP, SAT_MAX_STEP)
+        ln_rho = ln_rho - step
+        return ln_rho, sat_residual(ln_rho, x, t, params), step, i + 1
+
+    ln_rho, res, step, i = jax.lax.while_loop(
+        cond_fn, body_fn, (ln_rho, res, np.ones_like(ln_rho), 0)
+    )
+
+    rho_l, rho_v = np.exp(ln_rho)
+    p = pcsaft_p(x, t, rho_v, params)
+    two_phase = ln_rho[0] - ln_rho[1] > 1.0e-3
+    # in float32 the residuals can stall above `tol` at the rounding noise
+    converged = (
+        (np.all(np.abs(res) <= tol) | np.all(np.abs(step) <= tol))
+        & two_phase
+        & np.isfinite(p)
+        & (p > 0.0)
+    )
+    # phases collapsing into one means no equilibrium, at or above the critical point
+    status = np.select(
+        [converged, ~two_phase, i >= SAT_MAXITER],
+        [SolverStatus.CONVERGED, SolverStatus.ABOVE_CRITICAL, SolverStatus.MAX_ITER],
+        SolverStatus.NO_ROOT,
+    )
+
+    return SatResult(p, rho_l, rho_v, converged, status)
+
+
+@jax.jit
+def pcsaft_hvap(x, t, p_guess, params):
+    """
+    Enthalpy of vaporization (J mol^-1) of a pure component at temperature `t` (K)
+    as the difference of residual enthalpies of the phases from `pcsaft_sat`.
+    NaN where the saturation solver did not converge.
+    """
+    sat = pcsaft_sat(x, t, p_guess, params)
+    hvap = pcsaft_hres(x, t, sat.rho_v, params) - pcsaft_hres(x, t, sat.rho_l, params)
+    return np.where(sat.converged, hvap, np.nan)
+
+
+@jax.jit
+def pcsaft_VP(x, t, p_guess, params):
+    """
+    Vapor pressure calculation of a pure component, the pressure of the
+    saturation state solved by `pcsaft_sat` from `p_guess`.
+    For mixtures see the bubble points of `epcsaftmix_jax`.
+
+    x : ndarray, shape (n,1)
+        Mole fractions of each component. It has a length of n, where n is
+        the number of components in the system.
+    m : ndarray, shape (n,1)
+        Segment number for each component.
+    s : ndarray, shape (n,1)
+        Segment diameter for each component. For ions this is the diameter of
+        the hydrated ion. Units of Angstrom.
+    e : ndarray, shape (n,1)
+        Dispersion energy of each component. For ions this is the dispersion
+        energy of the hydrated ion. Units of K.
+    t : float
+        Temperature (K)
+    k_ij : ndarray, shape (n,n)
+        Binary interaction parameters between components in the mixture for dispersion energy.
+        (dimensions: ncomp x ncomp)
+    l_ij : ndarray, shape (n,n)
+        Binary interaction parameters between components in the mixture for segment diameter.
+        (dimensions: ncomp x ncomp)
+    khb_ij : ndarray, shape (n,n)
+        Binary interaction parameters between components in the mixture for association energy.
+        (dimensions: ncomp x ncomp)
+    e_assoc : ndarray, shape (n,1)
+        Association energy of the associating components. For non associating
+        compounds this is set to 0. Units of K.
+    vol_a : ndarray, shape (n,1)
+        Effective association volume of the associating components. For non
+        associating compounds this is set to 0.
+    dipm : ndarray, shape (n,1)
+        Dipole moment of the polar components. For components where the dipole
+        term is not used this is set to 0. Units of Debye.
+    dip_num : ndarray, shape (n,1)
+        The effective number of dipole functional groups on each component
+        molecule.
+    z : ndarray, shape (n,1)
+        Charge number of the ions
+    dielc : ndarray, shape (n,1)
+        permittivity of each component of the medium to be used for electrolyte
+        calculations.
+
+    Returns
+    -------
+    VP : float
+        Vapor Pressure (Pa), NaN when the saturation solver did not converge.
+    """
+
+    sat = pcsaft_sat(x, t, p_guess, params)
+    return np.where(sat.converged, sat.p, np.nan)
+
+
+X_PURE = onp.ones((1, 1))  # mole fraction of a pure component
+NUM_PARA = 8  # (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb)
+
+# `params` keys of each kernel variant on top of the hard-chain and dispersion ones
+VARIANTS = {
+    "nonpolar": (),
+    "polar": POLAR_KEYS,
+    "assoc": ASSOC_KEYS,
+    "polar_assoc": POLAR_KEYS + ASSOC_KEYS,
+    "full": POLAR_KEYS + ASSOC_KEYS + ION_KEYS,
+}
+
+
+@partial(jax.jit, static_argnames="variant")
+def pure_params(para, variant="full"):
+    """
+    ePC-SAFT `params` of a pure component from the parameter vector used in
+    `epcsaft.utils`, (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb).
+    Missing trailing parameters are taken as zero. `na` and `nb` are not used,
+    the association term here is of the 2B type, see `pure_variant`.
+    Only the keys of `variant`
+    (see `VARIANTS`) are kept, so `pcsaft_ares` skips the other terms.
+    """
+    para = np.pad(para, (0, NUM_PARA - para.shape[0]))
+    zero = np.zeros((1, 1), dtype=para.dtype)
+
+    def comp(value):
+        return value.reshape(1, 1)
+
+    params = {
+        "m": comp(np.maximum(para[0], 1.0)),
+        "s": comp(para[1]),
+        "e": comp(para[2]),
+        "vol_a": comp(para[3]),
+        "e_assoc": comp(para[4]),
+        "dipm": comp(para[5]),
+        "dip_num": np.ones((1, 1), dtype=para.dtype),
+        "k_ij": zero,
+        "l_ij": zero,
+        "khb_ij": zero,
+        "z": zero,
+        "dielc": zero,
+    }
+    keys = ("m", "s", "e", "k_ij", "l_ij") + VARIANTS[variant]
+    return {key: params[key] for key in keys}
+
+
+def pure_variant(para) -> Optional[str]:
+    """
+    Cheapest kernel variant that is exact for a pure component
+    parameter vector, see `VARIANTS`. As in feos, association needs sites
+    of both types (`na * nb > 0`). The kernels only implement the 2B type
+    (`na == nb == 1`), so other associating compounds have no variant (None).
+    """
+    para = onp.pad(onp.asarray(para, dtype=float), (0, NUM_PARA - len(para)))
+    polar = para[5] != 0
+    assoc = (para[3] != 0) and (para[4] != 0) and (para[6] * para[7] != 0)
+    if assoc and not para[6] == para[7] == 1:
+        return None
+    if polar and assoc:
+        return "polar_assoc"
+    if polar:
+        return "polar"
+    if assoc:
+        return "assoc"
+    return "nonpolar"
+
+
+def group_by_variant(para) -> dict:
+    """Indices of the rows of `para` (B, k) for each kernel variant in use.
+    Rows without a variant, see `pure_variant`, are in no group."""
+    variants = onp.asarray([pure_variant(row) for row in onp.asarray(para)])
+    return {
+        variant: onp.flatnonzero(variants == variant)
+        for variant in VARIANTS
+        if onp.any(variants == variant)
+    }
+
+
+def batch_pure_dispatch(batch_fn, para, states, mask, precision=None):
+    """
+    Evaluates `batch_fn(para, states, mask, variant)` (e.g. `batch_pure_den`)
+    once per group of `group_by_variant`, so each group runs the kernel
+    specialised to its terms. Results, arrays or pytrees of arrays such as
+    `SatResult`, are returned in the order of `para`. Rows without a variant
+    (see `pure_variant`) are NaN, not converged and `SolverStatus.UNSUPPORTED`,
+    and the result is None when no row has one.
+    `para` and `states` are cast to `precision` ("float64" or "float32"),
+    by default the precision of the process, see `dtypes.cast_precision`.
+    With several host devices, each group is split over them,
+    see `sharding.shard_batch`.
+    """
+    para, states = (
+        onp.asarray(array) for array in cast_precision(precision, para, states)
+    )
+    mask = onp.asarray(mask)
+
+    def empty(leaf):
+        fill = SolverStatus.UNSUPPORTED
+        if onp.issubdtype(leaf.dtype, onp.floating):
+            fill = onp.nan
+        elif onp.issubdtype(leaf.dtype, onp.bool_):
+            fill = False
+        return onp.full(mask.shape, fill, dtype=leaf.dtype)
+
+    def scatter(idx):
+        def fn(out, leaf):
+            out[idx] = leaf
+            return out
+
+        return fn
+
+    out = None
+    for variant, idx in group_by_variant(para).items():
+        res = shard_batch(batch_fn, para[idx], states[idx], mask[idx], variant)
+        if out is None:
+            out = jax.tree_util.tree_map(empty, res)
+        out = jax.tree_util.tree_map(scatter(idx), out, res)
+    return out
+
+
+def _mask_states(states, mask):
+    "Replaces padded states with a harmless one so solvers exit quickly."
+    dummy = np.asarray([300.0, 101325.0, 1.0, 0.0, 101325.0], dtype=states.dtype)
+    return np.where(mask[..., np.newaxis], states, dummy)
+
+
+def _pure_den_state(para, state, variant):
+    "Density of one state (T, P, phase, ...) of a pure component."
+    return pcsaft_den(
+        X_PURE.astype(para.dtype),
+        state[0],
+        state[1],
+        state[2],
+        pure_params(para, variant),
+    )
+
+
+def _pure_den_result_state(para, state, variant):
+    "Density of one state (T, P, phase, ...) of a pure component and its status."
+    return pcsaft_den_result(
+        X_PURE.astype(para.dtype),
+        state[0],
+        state[1],
+        state[2],
+        pure_params(para, variant),
+    )
+
+
+def _pure_derivs_state(para, state, variant):
+    "Second derivative properties at one state (T, P, phase, ...) of a pure component."
+    params = pure_params(para, variant)
+    rho = pcsaft_den(X_PURE.astype(para.dtype), state[0], state[1], state[2], params)
+    return pcsaft_derivs(X_PURE.astype(para.dtype), state[0], rho, params)
+
+
+def _pure_hvap_state(para, state, variant):
+    "Enthalpy of vaporization at one state (T, ..., p_guess) of a pure component."
+    return pcsaft_hvap(
+        X_PURE.astype(para.dtype), state[0], state[-1], pure_params(para, variant)
+    )
+
+
+def _pure_sat_state(para, state, variant):
+    "Saturation state at one state (T, ..., p_guess) of a pure component."
+    return pcsaft_sat(
+        X_PURE.astype(para.dtype), state[0], state[-1], pure_params(para, variant)
+    )
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_sat(para, states, mask, variant="full"):
+    """
+    Saturation state of many pure components at many temperatures in one call.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, ..., y) of each component, as in the `vp` tensors
+        of `ThermoMLDataset`. The last column is used as `p_guess`
+        of `pcsaft_sat`.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    SatResult
+        Arrays of shape (B, N), with `converged` False for padding.
+    """
+    states = _mask_states(states, mask)
+    sat = jax.vmap(jax.vmap(partial(_pure_sat_state, variant=variant), (None, 0)))(
+        para, states
+    )
+    return sat._replace(converged=sat.converged & mask)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_den(para, states, mask, variant="full"):
+    """
+    Density of many pure components at many states in one call.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, P, phase, ..., y) of each component, as in
+        the `rho` tensors of `ThermoMLDataset`.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`. Use `batch_pure_dispatch` to pick
+        the cheapest exact one per component.
+
+    Returns
+    -------
+    rho : ndarray, shape (B, N)
+        Molar density (mol / m^3), NaN for padding.
+    """
+    states = _mask_states(states, mask)
+    rho = jax.vmap(jax.vmap(partial(_pure_den_state, variant=variant), (None, 0)))(
+        para, states
+    )
+    return np.where(mask, rho, np.nan)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_den_result(para, states, mask, variant="full"):
+    """
+    Density of many pure components at many states in one call,
+    with the outcome of the solver, see `pcsaft_den_result`.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, P, phase, ..., y) of each component.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    DenResult
+        Arrays of shape (B, N), with `converged` False for padding.
+    """
+    states = _mask_states(states, mask)
+    den = jax.vmap(
+        jax.vmap(partial(_pure_den_result_state, variant=variant), (None, 0))
+    )(para, states)
+    return den._replace(converged=den.converged & mask)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_vp(para, states, mask, variant="full"):
+    """
+    Vapor pressure of many pure components at many states in one call.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, ..., y) of each component, as in the `vp` tensors
+        of `ThermoMLDataset`. The last column is used as `p_guess`
+        of `pcsaft_sat`.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`. Use `batch_pure_dispatch` to pick
+        the cheapest exact one per component.
+
+    Returns
+    -------
+    VP : ndarray, shape (B, N)
+        Vapor pressure (Pa), NaN for padding and states that did not converge.
+    """
+    sat = batch_pure_sat(para, states, mask, variant)
+    return np.where(sat.converged, sat.p, np.nan)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_derivs(para, states, mask, variant="full"):
+    """
+    Density and second derivative properties of many pure components
+    at many states in one call.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, P, phase, ..., y) of each component.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    DerivProps
+        Arrays of shape (B, N), NaN for padding.
+    """
+    states = _mask_states(states, mask)
+    derivs = jax.vmap(
+        jax.vmap(partial(_pure_derivs_state, variant=variant), (None, 0))
+    )(para, states)
+    return jax.tree_util.tree_map(lambda prop: np.where(mask, prop, np.nan), derivs)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_hvap(para, states, mask, variant="full"):
+    """
+    Enthalpy of vaporization of many pure components at many temperatures
+    in one call.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states (T, ..., p_guess) of each component, see `batch_pure_sat`.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    hvap : ndarray, shape (B, N)
+        Enthalpy of vaporization (J mol^-1), NaN for padding
+        and states that did not converge.
+    """
+    states = _mask_states(states, mask)
+    hvap = jax.vmap(jax.vmap(partial(_pure_hvap_state, variant=variant), (None, 0)))(
+        para, states
+    )
+    return np.where(mask, hvap, np.nan)
+
+
+def _implicit_den_state(para, state, rho, variant):
+    """
+    Density `rho` solved at one state (T, P, phase, ...), differentiable with
+    respect to `para` by the implicit function theorem on P(rho, para) = P.
+    The added term is zero, its derivative is -(dP / d para) / (dP / d rho).
+    """
+    x = X_PURE.astype(para.dtype)
+    rho = jax.lax.stop_gradient(rho)
+
+    def p_fn(rho, para):
+        return pcsaft_p(x, state[0], rho, pure_params(para, variant))
+
+    p, dp_drho = jax.value_and_grad(p_fn)(rho, jax.lax.stop_gradient(para))
+    dp = p_fn(rho, para) - p
+    return rho - dp / dp_drho
+
+
+def _implicit_vp_state(para, state, sat, variant):
+    """
+    Vapor pressure of the saturation state `sat` = (p, rho_l, rho_v) at
+    one state (T, ...), differentiable with respect to `para` by the implicit
+    function theorem on mu_L = mu_V. With d mu / d p = 1 / rho and
+    d mu / d para = RT d ares / d para at constant T and rho, the added term
+    is zero and its derivative is
+    RT (d ares_L / d para - d ares_V / d para) / (1 / rho_V - 1 / rho_L).
+    """
+    x = X_PURE.astype(para.dtype)
+    t = state[0]
+    p_sat, rho_l, rho_v = jax.lax.stop_gradient(sat)
+
+    def dares_fn(para):
+        params = pure_params(para, variant)
+        return (
+            pcsaft_ares(x, t, rho_l, params) - pcsaft_ares(x, t, rho_v, params)
+        ).squeeze()
+
+    kb = 1.380648465952442093e-23  # Boltzmann constant, J K^-1
+    nav = 6.022140857e23  # Avogadro's number
+    dares = dares_fn(para) - dares_fn(jax.lax.stop_gradient(para))
+    return p_sat + kb * nav * t * dares / (1.0 / rho_v - 1.0 / rho_l)
+
+
+def _pure_den_grad_state(para, state, rho, variant):
+    "d rho / d para of a density `rho` solved at one state (T, P, phase, ...)."
+    return jax.grad(_implicit_den_state)(para, state, rho, variant)
+
+
+def _pure_vp_grad_state(para, state, p_sat, variant):
+    "d p_sat / d para of a vapor pressure `p_sat` solved at one state (T, ...)."
+    x = X_PURE.astype(para.dtype)
+    params = pure_params(para, variant)
+    rho_l = pcsaft_den(x, state[0], p_sat, 1.0, params)
+    rho_v = pcsaft_den(x, state[0], p_sat, 0.0, params)
+    return jax.grad(_implicit_vp_state)(para, state, (p_sat, rho_l, rho_v), variant)
+
+
+@partial(jax.jit, static_argnames="variant")
+def pure_den_grad(para, states, rho, variant="full"):
+    """
+    Sensitivities of densities solved by any backend (e.g. feos) to the
+    parameters, by the implicit function theorem on P(rho, para) = P:
+    d rho / d para = -(dP / d para) / (dP / d rho).
+
+    Parameters
+    ----------
+    para : ndarray, shape (k,)
+        Parameter vector, see `pure_params`.
+    states : ndarray, shape (N, 5)
+        States (T, P, phase, ...).
+    rho : ndarray, shape (N,)
+        Molar density (mol / m^3) at each state, NaN where it failed.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    ndarray, shape (N, k)
+        d rho / d para, NaN where `rho` is NaN.
+    """
+    valid = np.isfinite(rho)
+    states = _mask_states(states, valid)
+    rho = np.where(valid, rho, 1.0)
+    grad = jax.vmap(partial(_pure_den_grad_state, variant=variant), (None, 0, 0))(
+        para, states, rho
+    )
+    return np.where(valid[:, np.newaxis], grad, np.nan)
+
+
+@partial(jax.jit, static_argnames="variant")
+def pure_vp_grad(para, states, p_sat, variant="full"):
+    """
+    Sensitivities of vapor pressures solved by any backend (e.g. feos) to the
+    parameters, by the implicit function theorem on the isofugacity condition
+    mu_L(T, p_sat, para) = mu_V(T, p_sat, para). With d mu / d p = 1 / rho
+    and d mu / d para = RT d ares / d para at constant T and rho:
+    d p_sat / d para = RT (d ares_L / d para - d ares_V / d para) / (1 / rho_V - 1 / rho_L),
+    with the phase densities at `p_sat` from `pcsaft_den`.
+
+    Parameters
+    ----------
+    para : ndarray, shape (k,)
+        Parameter vector, see `pure_params`.
+    states : ndarray, shape (N, 5)
+        States (T, ...).
+    p_sat : ndarray, shape (N,)
+        Vapor pressure (Pa) at each state, NaN where it failed.
+    variant : str
+        Kernel variant, see `VARIANTS`.
+
+    Returns
+    -------
+    ndarray, shape (N, k)
+        d p_sat / d para, NaN where `p_sat` is NaN.
+    """
+    valid = np.isfinite(p_sat)
+    states = _mask_states(states, valid)
+    p_sat = np.where(valid, p_sat, 101325.0)
+    grad = jax.vmap(partial(_pure_vp_grad_state, variant=variant), (None, 0, 0))(
+        para, states, p_sat
+    )
+    return np.where(valid[:, np.newaxis], grad, np.nan)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_den_implicit(para, states, mask, variant="full"):
+    """
+    Density of many pure components at many states, as `batch_pure_den`,
+    differentiable with respect to `para` (`jax.grad`, `jax.vjp`, `jax.jvp`).
+    The solver runs on `stop_gradient(para)` and the derivatives come from
+    the implicit function theorem at the solution, see `_implicit_den_state`.
+
+    Returns
+    -------
+    rho : ndarray, shape (B, N)
+        Molar density (mol / m^3), NaN for padding and failed states.
+    """
+    rho = batch_pure_den(jax.lax.stop_gradient(para), states, mask, variant)
+    valid = np.isfinite(rho)
+    states = _mask_states(states, valid)
+    rho = np.where(valid, rho, 1.0)
+    rho = jax.vmap(
+        jax.vmap(partial(_implicit_den_state, variant=variant), (None, 0, 0))
+    )(para, states, rho)
+    return np.where(valid, rho, np.nan)
+
+
+@partial(jax.jit, static_argnames="variant")
+def batch_pure_vp_implicit(para, states, mask, variant="full"):
+    """
+    Vapor pressure of many pure components at many states, as `batch_pure_vp`,
+    differentiable with respect to `para` (`jax.grad`, `jax.vjp`, `jax.jvp`).
+    The solver runs on `stop_gradient(para)` and the derivatives come from
+    the implicit function theorem at the solution, see `_implicit_vp_state`.
+
+    Returns
+    -------
+    VP : ndarray, shape (B, N)
+        Vapor pressure (Pa), NaN for padding and states that did not converge.
+    """
+    sat = batch_pure_sat(jax.lax.stop_gradient(para), states, mask, variant)
+    valid = sat.converged
+    states = _mask_states(states, valid)
+    sat = (
+        np.where(valid, sat.p, 101325.0),
+        np.where(valid, sat.rho_l, 1.0e4),
+        np.where(valid, sat.rho_v, 1.0),
+    )
+    vp = jax.vmap(jax.vmap(partial(_implicit_vp_state, variant=variant), (None, 0, 0)))(
+        para, states, sat
+    )
+    return np.where(valid, vp, np.nan)
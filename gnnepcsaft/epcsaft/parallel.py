@@ -0,0 +1,73 @@
+"""Module for parallel ePC-SAFT evaluation with a process pool."""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from typing import Any, Callable, NamedTuple, Optional, Sequence
+
+# `spawn` avoids forking a parent that already runs torch/XLA threads
+MP_CONTEXT = "spawn"
+
+_pools: dict = {}
+
+
+class JobResult(NamedTuple):
+    "Outcome of one job: `result` is `None` when `error` holds the raised exception."
+
+    result: Any
+    error: Optional[str] = None
+
+
+def run_job(fn: Callable, args: tuple) -> JobResult:
+    "Runs `fn(*args)` capturing any exception."
+    try:
+        return JobResult(fn(*args))
+    except Exception as err:  # pylint: disable = broad-exception-caught
+        return JobResult(None, repr(err))
+
+
+def num_workers(max_workers: Optional[int] = None) -> int:
+    "Number of processes to use, `None` or `0` meaning all cores."
+    if not max_workers:
+        max_workers = os.cpu_count() or 1
+    return max_workers
+
+
+def get_pool(max_workers: Optional[int] = None) -> ProcessPoolExecutor:
+    "Returns a process pool with `max_workers` processes, reused between calls."
+    max_workers = num_workers(max_workers)
+    if max_workers not in _pools:
+        _pools[max_workers] = ProcessPoolExecutor(
+            max_workers, mp_context=multiprocessing.get_context(MP_CONTEXT)
+        )
+    return _pools[max_workers]
+
+
+def shutdown_pools():
+    "Shuts down all process pools created by `get_pool`."
+    for pool in _pools.values():
+        pool.shutdown()
+    _pools.clear()
+
+
+def run_jobs(
+    fn: Callable,
+    jobs: Sequence[tuple],
+    max_workers: Optional[int] = None,
+) -> list[JobResult]:
+    """Evaluates `fn(*job)` for every job in a process pool.
+
+    `fn` must be picklable, e.g. `pure_den_feos_batch` with jobs of
+    (parameters, states). Results are returned in the same order as `jobs`,
+    with exceptions captured per job in `JobResult.error`.
+    Runs serially in the current process when `max_workers` is 1
+    or there is at most one job.
+    """
+    max_workers = num_workers(max_workers)
+    if max_workers == 1 or len(jobs) <= 1:
+        return [run_job(fn, job) for job in jobs]
+
+    pool = get_pool(max_workers)
+    chunksize = max(1, len(jobs) // (4 * max_workers))
+    return list(pool.map(run_job, repeat(fn), jobs, chunksize=chunksize))
@@ -0,0 +1,174 @@
+"""Module for the accuracy of each floating point precision of the ePC-SAFT JAX kernels.
+
+`accuracy_report` measures the deviations of each precision (see `dtypes`)
+from feos on ThermoML states.
+
+Usage::
+
+    python -m gnnepcsaft.epcsaft.precision --workdir=. --dataset=esper
+"""
+
+import json
+from typing import Optional, Sequence
+
+import numpy as np
+from absl import app, flags, logging
+
+from .dtypes import PRECISIONS, set_precision
+from .epcsaftpure_jax import (
+    batch_pure_den,
+    batch_pure_dispatch,
+    batch_pure_vp,
+    pure_variant,
+)
+from .utils import pure_den_feos_batch, pure_vp_feos_curve
+
+
+def feos_reference(para: np.ndarray, states: np.ndarray, mask: np.ndarray, kind: str):
+    """
+    Density (`kind` "den") or vapor pressure (`kind` "vp") of padded
+    (B, N) states with feos, NaN for padding and failed states.
+    """
+    ref = np.full(mask.shape, np.nan)
+    for i, (parameters, states_i, mask_i) in enumerate(zip(para, states, mask)):
+        if not np.any(mask_i):
+            continue
+        try:
+            if kind == "den":
+                ref[i, mask_i] = pure_den_feos_batch(parameters, states_i[mask_i])
+            else:
+                ref[i, mask_i] = pure_vp_feos_curve(parameters, states_i[mask_i])
+        except Exception as err:  # pylint: disable = broad-exception-caught
+            logging.warning(f"feos failed for {parameters}: {err!r}")
+    return ref
+
+
+def accuracy_report(
+    para: np.ndarray,
+    states: np.ndarray,
+    mask: np.ndarray,
+    kind: str = "den",
+    precisions: Sequence[str] = ("float64", "float32"),
+) -> dict:
+    """
+    Relative deviations of the JAX kernels from feos for each precision.
+    Molecules the kernels do not implement (see `pure_variant`) are left out.
+
+    Parameters
+    ----------
+    para : ndarray, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : ndarray, shape (B, N, 5)
+        Padded states, see `pad_states`.
+    mask : ndarray, shape (B, N)
+        True for valid states, False for padding.
+    kind : str
+        "den" for density or "vp" for vapor pressure.
+    precisions : sequence of str
+        Precisions to compare, see `PRECISIONS`.
+
+    Returns
+    -------
+    dict
+        For each precision: median, 99th percentile and maximum relative
+        deviation over the states solved by both, number of those states,
+        and the fraction of states solved by feos where the kernel fails.
+    """
+    para, states, mask = np.asarray(para), np.asarray(states), np.asarray(mask)
+    supported = np.asarray([pure_variant(row) is not None for row in para], bool)
+    para, states, mask = para[supported], states[supported], mask[supported]
+    ref = feos_reference(para, states, mask, kind)
+    batch_fn = batch_pure_den if kind == "den" else batch_pure_vp
+
+    report = {}
+    for precision in precisions:
+        pred = batch_pure_dispatch(batch_fn, para, states, mask, precision)
+        pred = np.asarray(pred, dtype=np.float64)
+        solved = np.isfinite(ref) & np.isfinite(pred)
+        dev = np.abs(pred[solved] / ref[solved] - 1.0)
+        report[precision] = {
+            "median": float(np.median(dev)) if dev.size else float("nan"),
+            "p99": float(np.quantile(dev, 0.99)) if dev.size else float("nan"),
+            "max": float(np.max(dev)) if dev.size else float("nan"),
+            "num_states": int(solved.sum()),
+            "failure_rate": float(
+                np.mean(~np.isfinite(pred[np.isfinite(ref)]))
+                if np.isfinite(ref).any()
+                else float("nan")
+            ),
+        }
+    return report
+
+
+def thermoml_states(workdir: str, dataset: str, max_molecules: Optional[int] = None):
+    """
+    Parameters of `dataset` ("ramirez" or "esper") and padded ThermoML density
+    and vapor pressure states of the molecules in both, by InChI.
+    """
+    # pylint: disable = import-outside-toplevel
+    from ..data.graphdataset import pad_states
+    from ..train.utils import build_test_dataset, build_train_dataset
+
+    train_dataset = build_train_dataset(workdir, dataset)
+    para_data = {}
+    for graph in train_dataset:
+        para = graph.para.tolist()
+        if dataset == "esper":
+            # (m, s, e, kappa_ab, epsilon_k_ab) + (mu, na, nb)
+            para += graph.munanb.tolist()
+        para_data[graph.InChI] = para
+    test_loader, _ = build_test_dataset(workdir, train_dataset)
+
+    para, rho, vp = [], [], []
+    for graph in test_loader:
+        if graph.InChI not in para_data:
+            continue
+        para.append(
+            np.pad(para_data[graph.InChI], (0, 8 - len(para_data[graph.InChI])))
+        )
+        rho.append(graph.rho.view(-1, 5))
+        vp.append(graph.vp.view(-1, 5))
+        if max_molecules and len(para) >= max_molecules:
+            break
+    para = np.asarray(para)
+    rho, rho_mask = pad_states(rho)
+    vp, vp_mask = pad_states(vp)
+    return para, (rho.numpy(), rho_mask.numpy()), (vp.numpy(), vp_mask.numpy())
+
+
+FLAGS = flags.FLAGS
+
+
+def define_flags():
+    """
+    Flags of the command line, defined only when run as a script since
+    `benchmark` imports this module and defines flags of the same names.
+    """
+    flags.DEFINE_string("workdir", None, "Working Directory.")
+    flags.DEFINE_string(
+        "dataset", "esper", "Dataset with the parameters: ramirez or esper."
+    )
+    flags.DEFINE_integer("max_molecules", 100, "Number of molecules to compare.")
+    flags.DEFINE_list("precisions", list(PRECISIONS), "Precisions to compare.")
+
+
+def main(argv):
+    """Execution from command line"""
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+
+    set_precision("float64")
+    para, (rho, rho_mask), (vp, vp_mask) = thermoml_states(
+        FLAGS.workdir, FLAGS.dataset, FLAGS.max_molecules
+    )
+    report = {
+        "den": accuracy_report(para, rho, rho_mask, "den", FLAGS.precisions),
+        "vp": accuracy_report(para, vp, vp_mask, "vp", FLAGS.precisions),
+    }
+    logging.info(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    define_flags()
+    flags.mark_flags_as_required(["workdir"])
+    app.run(main)
@@ -0,0 +1,116 @@
+"""Module for sharding the batched ePC-SAFT JAX kernels over host CPU devices.
+
+XLA exposes a single CPU device by default, which runs a batch on one core.
+`set_host_device_count` splits the host into several XLA devices; the training
+and benchmark entry points call it, so it applies when the environment variable
+`GNNEPCSAFT_HOST_DEVICES` is set (a number, or "all" for every core). It must
+run before JAX creates its first array. `shard_batch` then splits the molecule
+axis of a batch over the devices, see `batch_pure_dispatch`.
+"""
+
+import os
+import re
+from functools import lru_cache, partial
+from typing import Optional
+
+import jax
+import jax.numpy as jnp
+import numpy as onp
+from absl import logging
+from jax.sharding import Mesh, NamedSharding, PartitionSpec
+
+try:
+    from jax import shard_map
+
+    # the solver loops mix device-varying and invariant values in their carry
+    NO_CHECK = {"check_vma": False}
+except ImportError:  # jax < 0.7
+    from jax.experimental.shard_map import shard_map
+
+    NO_CHECK = {"check_rep": False}
+
+HOST_DEVICES_ENV = "GNNEPCSAFT_HOST_DEVICES"
+HOST_DEVICES_FLAG = "--xla_force_host_platform_device_count"
+MESH_AXIS = "molecules"
+
+
+def set_host_device_count(num_devices: Optional[int] = None) -> Optional[int]:
+    """
+    Splits the host CPU into `num_devices` XLA devices, or into
+    `GNNEPCSAFT_HOST_DEVICES` when not given ("all" or 0 for every core).
+    Does nothing when neither is set. Has no effect once JAX has created
+    its first array. Returns the number of devices requested.
+    """
+    if num_devices is None:
+        env = os.environ.get(HOST_DEVICES_ENV)
+        if not env:
+            return None
+        num_devices = 0 if env == "all" else int(env)
+    num_devices = num_devices or os.cpu_count() or 1
+
+    xla_flags = re.sub(
+        rf"{HOST_DEVICES_FLAG}=\d+\s*", "", os.environ.get("XLA_FLAGS", "")
+    )
+    os.environ["XLA_FLAGS"] = f"{xla_flags} {HOST_DEVICES_FLAG}={num_devices}".strip()
+    return num_devices
+
+
+def molecule_mesh() -> Mesh:
+    "One dimensional mesh of the local devices over the molecule axis."
+    return Mesh(onp.asarray(jax.local_devices()), (MESH_AXIS,))
+
+
+def pad_molecules(para, states, mask, num_devices: int):
+    """
+    Pads the molecule axis of `para` (B, k), `states` (B, N, 5) and `mask` (B, N)
+    to a multiple of `num_devices` with copies of the first molecule
+    and masked states. Returns the padded arrays, traceable by `jax.vjp`.
+    """
+    pad = -len(para) % num_devices
+    if pad == 0:
+        return para, states, mask
+    return (
+        jnp.concatenate([para, jnp.repeat(para[:1], pad, 0)]),
+        jnp.concatenate([states, jnp.repeat(states[:1], pad, 0)]),
+        jnp.concatenate([mask, jnp.zeros((pad,) + mask.shape[1:], bool)]),
+    )
+
+
+@lru_cache
+def _sharded_fn(batch_fn, variant: str, mesh: Mesh):
+    spec = PartitionSpec(MESH_AXIS)
+    return jax.jit(
+        shard_map(
+            partial(batch_fn, variant=variant),
+            mesh=mesh,
+            in_specs=(spec, spec, spec),
+            out_specs=spec,
+            **NO_CHECK,
+        )
+    )
+
+
+def shard_batch(batch_fn, para, states, mask, variant: str = "full"):
+    """
+    Evaluates `batch_fn(para, states, mask, variant)` (e.g. `batch_pure_den`)
+    with the molecule axis split over the local devices, each device
+    solving its share independently. The batch is padded to a multiple of
+    the device count with `pad_molecules` and the results, arrays or pytrees
+    of arrays, are trimmed back to the `B` molecules of `para`.
+    Calls `batch_fn` directly with a single device.
+    Differentiable with respect to `para` when `batch_fn` is, see `torch_bridge`.
+    """
+    num_devices = jax.local_device_count()
+    if num_devices == 1:
+        return batch_fn(para, states, mask, variant)
+
+    num_mol = len(para)
+    para, states, mask = pad_molecules(para, states, mask, num_devices)
+    logging.debug(f"sharding {num_mol} molecules over {num_devices} devices")
+    mesh = molecule_mesh()
+    # arrays from DLPack are committed to one device, so they are moved explicitly
+    para, states, mask = jax.device_put(
+        (para, states, mask), NamedSharding(mesh, PartitionSpec(MESH_AXIS))
+    )
+    res = _sharded_fn(batch_fn, variant, mesh)(para, states, mask)
+    return jax.tree_util.tree_map(lambda leaf: leaf[:num_mol], res)
@@ -0,0 +1,29 @@
+"""Module for the per-state status codes of the ePC-SAFT solvers.
+
+Batched property functions return a status array next to the values,
+so callers can mask failed states and count failures without exceptions.
+"""
+
+from enum import IntEnum
+
+import numpy as np
+
+
+class SolverStatus(IntEnum):
+    "Outcome of a solver for one state."
+
+    CONVERGED = 0
+    ABOVE_CRITICAL = 1  # no phase equilibrium, at or above the critical temperature
+    NO_ROOT = 2  # no solution found, e.g. no density root at the pressure
+    MAX_ITER = 3  # iteration limit reached before the tolerance
+    UNSUPPORTED = 4  # the backend does not implement the model of the compound
+
+
+# failures another backend may solve, see `backends.pure_property`
+RETRY = (SolverStatus.NO_ROOT, SolverStatus.MAX_ITER, SolverStatus.UNSUPPORTED)
+
+
+def status_counts(status: np.ndarray) -> dict:
+    "Number of states of each `SolverStatus` name in `status`."
+    status = np.asarray(status)
+    return {code.name: int(np.sum(status == code)) for code in SolverStatus}
@@ -0,0 +1,125 @@
+"""Module for evaluating the batched ePC-SAFT JAX kernels inside a Torch graph.
+
+Tensors are exchanged with JAX through DLPack, without copies when JAX can
+address their device (e.g. CPU tensors and the CPU backend), and gradients
+with respect to the parameters are propagated with `jax.vjp` of
+`batch_pure_den_implicit` / `batch_pure_vp_implicit`, split over the host
+devices by `sharding.shard_batch`.
+"""
+
+from functools import partial
+
+import jax
+import jax.dlpack
+import jax.numpy as jnp
+import numpy as np
+import torch
+
+from .dtypes import default_precision
+from .epcsaftpure_jax import (
+    batch_pure_den_implicit,
+    batch_pure_vp_implicit,
+    group_by_variant,
+)
+from .sharding import shard_batch
+
+KERNELS = {"den": batch_pure_den_implicit, "vp": batch_pure_vp_implicit}
+TORCH_DTYPES = {"float64": torch.float64, "float32": torch.float32}
+
+
+def to_jax(tensor: torch.Tensor, dtype=None) -> jax.Array:
+    """
+    JAX view of `tensor` (cast to `dtype` first) through DLPack,
+    copied through the host when JAX cannot address its device.
+    """
+    tensor = tensor.detach()
+    if dtype is not None:
+        tensor = tensor.to(dtype)
+    tensor = tensor.contiguous()
+    try:
+        return jax.dlpack.from_dlpack(tensor)
+    except (TypeError, ValueError, RuntimeError):
+        return jnp.asarray(tensor.cpu().numpy())
+
+
+def to_torch(array: jax.Array, like: torch.Tensor) -> torch.Tensor:
+    """
+    Torch view of `array` through DLPack, on the device and dtype of `like`,
+    copied through the host when it is sharded over several devices.
+    """
+    try:
+        tensor = torch.from_dlpack(array)
+    except BufferError:
+        tensor = torch.from_numpy(np.array(array))
+    return tensor.to(device=like.device, dtype=like.dtype)
+
+
+# pylint: disable = abstract-method
+class JaxPropFromTensor(torch.autograd.Function):
+    """
+    Custom `torch` function to calculate a property ("den" or "vp") of padded
+    states of a batch of pure components with the JAX kernels of one variant.
+    """
+
+    # pylint: disable = arguments-differ
+    # pylint: disable=R0913,R0917
+    @staticmethod
+    def forward(ctx, para, states, mask, prop: str, variant: str):
+        dtype = TORCH_DTYPES[default_precision()]
+        states, mask = to_jax(states, dtype), to_jax(mask)
+        kernel = partial(
+            shard_batch, KERNELS[prop], states=states, mask=mask, variant=variant
+        )
+        if ctx.needs_input_grad[0]:
+            result, ctx.vjp_fn = jax.vjp(kernel, to_jax(para, dtype))
+            ctx.para, ctx.sharding = para.detach(), result.sharding
+        else:
+            result = kernel(to_jax(para, dtype))
+        return to_torch(result, para)
+
+    @staticmethod
+    def backward(ctx, dg1: torch.Tensor):
+        dtype = TORCH_DTYPES[default_precision()]
+        # the cotangent goes to the devices of the result, see `shard_batch`
+        (grad_para,) = ctx.vjp_fn(jax.device_put(to_jax(dg1, dtype), ctx.sharding))
+        return to_torch(grad_para, ctx.para), None, None, None, None
+
+
+def batch_prop_from_tensor(
+    prop: str, para: torch.Tensor, states: torch.Tensor, mask: torch.Tensor
+) -> torch.Tensor:
+    """
+    Property `prop` ("den" or "vp") of many pure components at many states,
+    differentiable with respect to `para`. Each group of `group_by_variant`
+    runs its kernel variant, with the number of components padded to a
+    power of two (masked copies of the first one) to bound recompilation.
+
+    Parameters
+    ----------
+    para : Tensor, shape (B, k)
+        Parameter vectors, see `pure_params`.
+    states : Tensor, shape (B, N, 5)
+        Padded states, see `batch_pure_den` and `batch_pure_vp`.
+    mask : Tensor, shape (B, N)
+        True for valid states, False for padding.
+
+    Returns
+    -------
+    Tensor, shape (B, N)
+        NaN for padding and failed states.
+    """
+    out = torch.full(mask.shape, np.nan, dtype=para.dtype, device=para.device)
+    for variant, idx in group_by_variant(para.detach().cpu().numpy()).items():
+        num_mol = len(idx)
+        pad = 2 ** int(np.ceil(np.log2(num_mol))) - num_mol
+        idx = torch.as_tensor(np.concatenate([idx, idx[:1].repeat(pad)]))
+        idx = idx.to(para.device)
+        mask_i = mask[idx].clone()
+        mask_i[num_mol:] = False
+        res = JaxPropFromTensor.apply(para[idx], states[idx], mask_i, prop, variant)
+        out = out.index_copy(0, idx[:num_mol], res[:num_mol])
+    return out
+
+
+batch_den_from_tensor = partial(batch_prop_from_tensor, "den")
+batch_vp_from_tensor = partial(batch_prop_from_tensor, "vp")
@@ -1,4 +1,6 @@
-"""Module for ePC-SAFT calculations. """
+"""Module for ePC-SAFT calculations."""
+
+from functools import lru_cache
 
 import numpy as np
 import PCSAFTsuperanc
@@ -13,7 +15,12 @@ from feos.si import KELVIN, METER, MOL, PASCAL
 # pylint: enable = E0401,E0611
 from pcsaft import flashTQ, pcsaft_den
 
+from .status import SolverStatus
+
 N_A = PCSAFTsuperanc.N_A * (1e-10) ** 3  # adjusted to angstron unit
+EOS_CACHE_SIZE = 1024  # max number of feos EquationOfState objects kept in memory
+EOS_CACHE_DECIMALS = 10  # parameters are rounded to this before being used as key
+SERIES_MIN_STATES = 8  # smaller isobars don't pay off the saturation temperature
 
 
 def pure_den_teqp(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
@@ -64,11 +71,28 @@ def pure_den_pcsaft(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     return den
 
 
-# pylint: disable=R0914
-def pure_den_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
-    """Calcules pure component density with ePC-SAFT."""
+def pure_eos_feos(parameters: np.ndarray) -> EquationOfState:
+    """Builds the feos ePC-SAFT equation of state for a pure component.
 
-    t = state[0]  # Temperature, K
+    Equations of state are kept in a thread-safe LRU cache keyed by the
+    parameter vector rounded to `EOS_CACHE_DECIMALS`, so repeated calls
+    with the same parameters reuse the same object.
+    See `eos_cache_info` and `eos_cache_clear`.
+    """
+
+    return _cached_eos_feos(para_key(parameters))
+
+
+def para_key(parameters: np.ndarray) -> tuple:
+    "Hashable key of the 8 ePC-SAFT parameters rounded to `EOS_CACHE_DECIMALS`."
+
+    parameters = np.asarray(parameters, dtype=np.float64)[:8]
+    return tuple(np.round(parameters, EOS_CACHE_DECIMALS).tolist())
+
+
+@lru_cache(maxsize=EOS_CACHE_SIZE)
+def _cached_eos_feos(parameters: tuple) -> EquationOfState:
+    "Builds the feos equation of state from the cache key."
 
     m = max(parameters[0], 1.0)  # units
     s = parameters[1]  # Å
@@ -79,8 +103,6 @@ def pure_den_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     na = parameters[6]
     nb = parameters[7]
 
-    p = state[1]  # Pa
-
     record = PcSaftRecord(
         m=m,
         sigma=s,
@@ -92,40 +114,70 @@ def pure_den_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
         mu=mu,
     )
     para = PcSaftParameters.from_model_records([record])
-    eos = EquationOfState.pcsaft(para)
-    statenpt = State(eos, temperature=t * KELVIN, pressure=p * PASCAL)
+    return EquationOfState.pcsaft(para)
 
-    den = statenpt.density * (METER**3) / MOL
 
-    return den
+def eos_cache_info():
+    "Hits, misses, max size and current size of the feos equation of state cache."
+    return _cached_eos_feos.cache_info()
 
 
-def pure_vp_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
-    """Calcules pure component density with ePC-SAFT."""
+def eos_cache_clear():
+    "Empties the feos equation of state and critical point caches and resets their counters."
+    _cached_eos_feos.cache_clear()
+    _cached_tcrit_feos.cache_clear()
+
+
+@lru_cache(maxsize=EOS_CACHE_SIZE)
+def _cached_tcrit_feos(parameters: tuple) -> float:
+    "Critical temperature (K) from the cache key, infinite when the solver fails."
+
+    try:
+        critical_point = State.critical_point(_cached_eos_feos(parameters))
+    except RuntimeError:
+        return np.inf
+    return critical_point.temperature / KELVIN
+
+
+def pure_tcrit_feos(parameters: np.ndarray) -> float:
+    """Critical temperature (K) of a pure component with ePC-SAFT, computed once
+    per parameter vector (cached as in `pure_eos_feos`). Infinite when the
+    critical point solver fails, so no state is taken as supercritical."""
+
+    return _cached_tcrit_feos(para_key(parameters))
+
+
+def above_critical(parameters: np.ndarray, states: np.ndarray) -> np.ndarray:
+    "Rows of `states`, shape (N, 5), at or above the critical temperature."
+
+    return states[:, 0] >= pure_tcrit_feos(parameters)
+
+
+def feos_status(err: Exception) -> SolverStatus:
+    """`SolverStatus` of a failed feos call from its error message.
+    feos reports "supercritical" for any failed VLE, also at low temperatures,
+    so states above the critical point are found with `above_critical` instead."""
+    if "did not converge" in str(err):
+        return SolverStatus.MAX_ITER
+    return SolverStatus.NO_ROOT
+
+
+def _den_feos(eos: EquationOfState, state: np.ndarray) -> float:
+    "Density of one state with an already built equation of state."
 
     t = state[0]  # Temperature, K
+    p = state[1]  # Pa
 
-    m = max(parameters[0], 1.0)  # units
-    s = parameters[1]  # Å
-    e = parameters[2]  # K
-    kappa_ab = parameters[3]
-    epsilon_k_ab = parameters[4]  # K
-    mu = parameters[5]  # Debye
-    na = parameters[6]
-    nb = parameters[7]
+    statenpt = State(eos, temperature=t * KELVIN, pressure=p * PASCAL)
+
+    return statenpt.density * (METER**3) / MOL
+
+
+def _vp_feos(eos: EquationOfState, state: np.ndarray) -> float:
+    "Vapor pressure of one state with an already built equation of state."
+
+    t = state[0]  # Temperature, K
 
-    record = PcSaftRecord(
-        m=m,
-        sigma=s,
-        epsilon_k=e,
-        kappa_ab=kappa_ab,
-        epsilon_k_ab=epsilon_k_ab,
-        na=na,
-        nb=nb,
-        mu=mu,
-    )
-    para = PcSaftParameters.from_model_records([record])
-    eos = EquationOfState.pcsaft(para)
     vle = PhaseEquilibrium.pure(eos, temperature_or_pressure=t * KELVIN)
 
     assert t == vle.vapor.temperature / KELVIN
@@ -133,6 +185,164 @@ def pure_vp_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     return vle.vapor.pressure() / PASCAL
 
 
+def pure_den_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
+    """Calcules pure component density with ePC-SAFT."""
+
+    return _den_feos(pure_eos_feos(parameters), state)
+
+
+def pure_vp_feos(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
+    """Calcules pure component density with ePC-SAFT."""
+
+    return _vp_feos(pure_eos_feos(parameters), state)
+
+
+def pure_den_feos_batch(parameters: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """Calculates pure component density with ePC-SAFT for all rows of `states`,
+    shape (N, 5), building the equation of state only once."""
+
+    eos = pure_eos_feos(parameters)
+    den = np.zeros(states.shape[0])
+    for i, state in enumerate(states):
+        den[i] = _den_feos(eos, state)
+    return den
+
+
+def pure_den_feos_series(
+    parameters: np.ndarray, states: np.ndarray, return_status: bool = False
+):
+    """Calculates pure component density with ePC-SAFT for all rows of `states`,
+    solving them as series along isobars.
+
+    States are grouped by pressure (3 significant digits) and sorted by temperature.
+    Each solve is seeded with the previous converged density while the phase
+    (from the saturation temperature of the isobar) does not change.
+    States near the phase change, the first state of each phase
+    and failed warm starts are solved from scratch, as in `pure_den_feos`.
+    Isobars with fewer than `SERIES_MIN_STATES` states skip the saturation
+    temperature and are solved as in `pure_den_feos_batch`.
+    States that fail are NaN, and so are states with a non-finite T or P,
+    which feos solves to a spurious density; with `return_status`,
+    the `SolverStatus` of each state is returned too (`NO_ROOT` for the latter).
+    """
+
+    eos = pure_eos_feos(parameters)
+    den = np.full(states.shape[0], np.nan)
+    finite = np.all(np.isfinite(states[:, :2]), axis=1)
+    status = np.where(finite, SolverStatus.CONVERGED, SolverStatus.NO_ROOT)
+    status = status.astype(np.int8)
+    pressures = np.asarray([float(f"{p:.3g}") for p in states[:, 1]])
+    order = np.lexsort((states[:, 0], pressures))
+    order = order[finite[order]]
+    for group in np.split(order, np.flatnonzero(np.diff(pressures[order])) + 1):
+        if len(group) >= SERIES_MIN_STATES:
+            den[group], status[group] = _den_feos_isobar(eos, states[group])
+            continue
+        for i in group:
+            try:
+                den[i] = _den_feos(eos, states[i])
+            except RuntimeError as err:
+                status[i] = feos_status(err)
+    if return_status:
+        return den, status
+    return den
+
+
+def _den_feos_isobar(eos: EquationOfState, states: np.ndarray) -> tuple:
+    "Densities and `SolverStatus` of states of one isobar, sorted by temperature."
+
+    den = np.full(states.shape[0], np.nan)
+    status = np.full(states.shape[0], SolverStatus.CONVERGED, dtype=np.int8)
+    t_sat = _tsat_feos(eos, np.median(states[:, 1]))
+    density, liquid_prev = None, None
+    for i, state in enumerate(states):
+        t = state[0]  # Temperature, K
+        p = state[1]  # Pa
+        liquid = t < t_sat
+        if (liquid != liquid_prev) or (np.abs(t - t_sat) < 1.0):
+            density = None
+        statenpt = None
+        if density is not None:
+            try:
+                statenpt = State(
+                    eos,
+                    temperature=t * KELVIN,
+                    pressure=p * PASCAL,
+                    density_initialization=density,
+                )
+            except RuntimeError:
+                statenpt = None
+        if statenpt is None:
+            try:
+                statenpt = State(eos, temperature=t * KELVIN, pressure=p * PASCAL)
+            except RuntimeError as err:
+                density, status[i] = None, feos_status(err)
+                continue
+        density, liquid_prev = statenpt.density, liquid
+        den[i] = density * (METER**3) / MOL
+    return den, status
+
+
+def _tsat_feos(eos: EquationOfState, p: float) -> float:
+    "Saturation temperature (K) at pressure `p` (Pa), NaN when supercritical or failed."
+    try:
+        vle = PhaseEquilibrium.pure(eos, temperature_or_pressure=p * PASCAL)
+    except RuntimeError:
+        return np.nan
+    return vle.liquid.temperature / KELVIN
+
+
+def pure_vp_feos_batch(parameters: np.ndarray, states: np.ndarray) -> np.ndarray:
+    """Calculates pure component vapor pressure with ePC-SAFT for all rows of `states`,
+    shape (N, 5), building the equation of state only once."""
+
+    eos = pure_eos_feos(parameters)
+    vp = np.zeros(states.shape[0])
+    for i, state in enumerate(states):
+        vp[i] = _vp_feos(eos, state)
+    return vp
+
+
+def pure_vp_feos_curve(
+    parameters: np.ndarray, states: np.ndarray, return_status: bool = False
+):
+    """Calculates pure component vapor pressure with ePC-SAFT for all rows of `states`
+    in one sweep along the saturation curve.
+
+    Temperatures are solved once each, in increasing order, and every
+    `PhaseEquilibrium.pure` is started from the previous equilibrium.
+    Temperatures at or above the critical temperature (`pure_tcrit_feos`)
+    are not solved. Points where the solver fails or that are supercritical
+    are NaN; with `return_status`, the `SolverStatus` of each state is returned too.
+    """
+
+    eos = pure_eos_feos(parameters)
+    temperatures, inverse = np.unique(states[:, 0], return_inverse=True)
+    vp = np.full(temperatures.shape[0], np.nan)
+    status = np.where(
+        temperatures >= pure_tcrit_feos(parameters),
+        SolverStatus.ABOVE_CRITICAL,
+        SolverStatus.CONVERGED,
+    ).astype(np.int8)
+    vle = None
+    for i, t in enumerate(temperatures):
+        if status[i] == SolverStatus.ABOVE_CRITICAL:
+            break  # temperatures are sorted
+        try:
+            vle = PhaseEquilibrium.pure(
+                eos, temperature_or_pressure=t * KELVIN, initial_state=vle
+            )
+        except RuntimeError as err:
+            vle, status[i] = None, feos_status(err)
+            continue
+        vp[i] = vle.vapor.pressure() / PASCAL
+
+    inverse = inverse.reshape(-1)
+    if return_status:
+        return vp[inverse], status[inverse]
+    return vp[inverse]
+
+
 def pure_vp_teqp(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     """Calculates pure component vapor pressure with ePC-SAFT."""
 
@@ -159,6 +369,74 @@ def pure_vp_teqp(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     return p
 
 
+def superanc_compatible(parameters: np.ndarray) -> bool:
+    "Whether `pure_vp_superanc` applies, i.e. no association and dipole parameters."
+    return bool(np.all(np.asarray(parameters[3:6]) == 0))
+
+
+def superanc_range(parameters: np.ndarray) -> tuple[float, float]:
+    "Minimum and critical temperature (K) covered by the PC-SAFT superancillary."
+    [ttilde_crit, ttilde_min] = PCSAFTsuperanc.get_Ttilde_crit_min(
+        m=max(parameters[0], 1.0)
+    )
+    return ttilde_min * parameters[2], ttilde_crit * parameters[2]
+
+
+# pylint: disable=R0914
+def pure_vp_superanc(
+    parameters: np.ndarray,
+    states: np.ndarray,
+    polish: bool = False,
+    return_status: bool = False,
+):
+    """Calculates pure component vapor pressure with PC-SAFT for all rows of `states`
+    from the superancillary saturated densities, with no VLE solve.
+
+    Only valid for compounds without association and dipole parameters
+    (see `superanc_compatible`). With `polish`, the densities are refined
+    with one teqp `pure_VLE_T` call. Temperatures outside `superanc_range`
+    give NaN; with `return_status`, the `SolverStatus` of each state
+    is returned too.
+    """
+
+    x = np.array([1.0])  # mole fraction
+
+    m = max(parameters[0], 1.0)  # units
+    s = parameters[1]  # Å
+    e = parameters[2]  # K
+
+    # pylint: disable=E1101,I1101
+    c = teqp.SAFTCoeffs()
+    c.m = m
+    c.sigma_Angstrom = s
+    c.epsilon_over_k = e
+    model = teqp.PCSAFTEOS([c])
+    r = model.get_R(x)
+
+    t_min, t_crit = superanc_range(parameters)
+    vp = np.full(states.shape[0], np.nan)
+    status = np.where(
+        states[:, 0] >= t_crit,
+        SolverStatus.ABOVE_CRITICAL,
+        np.where(states[:, 0] < t_min, SolverStatus.NO_ROOT, SolverStatus.CONVERGED),
+    ).astype(np.int8)
+    for i, t in enumerate(states[:, 0]):
+        if not t_min <= t < t_crit:
+            continue
+        # T tilde = T / (e / kB), Rho tilde = RhoN * sigma ** 3
+        # https://teqp.readthedocs.io/en/latest/models/PCSAFT.html
+        [tilderhol, tilderhov] = PCSAFTsuperanc.PCSAFTsuperanc_rhoLV(Ttilde=t / e, m=m)
+        rhol, rhov = [tilderho / (N_A * s**3) for tilderho in [tilderhol, tilderhov]]
+        if polish:
+            rhol, rhov = model.pure_VLE_T(t, rhol, rhov, 10)
+        # P = rho * R * T * (1 + Ar01) https://teqp.readthedocs.io/en/latest/derivs/derivs.html
+        vp[i] = rhov * r * t * (1 + model.get_Ar01(t, rhov, x))
+
+    if return_status:
+        return vp, status
+    return vp
+
+
 def pure_vp_pcsaft(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     """Calculates pure component vapor pressure with ePC-SAFT."""
     x = np.asarray([1.0])
@@ -174,52 +452,74 @@ def pure_vp_pcsaft(parameters: np.ndarray, state: np.ndarray) -> np.ndarray:
     return p
 
 
+def _jacobian_from_jax(
+    prop: str, parameters: np.ndarray, states: np.ndarray, result: np.ndarray
+) -> torch.Tensor:
+    """Jacobian (N, k) of the property `prop` ("den" or "vp") solved as `result`
+    with respect to `parameters`, from the implicit function gradients of the
+    JAX kernels (`pure_den_grad` / `pure_vp_grad`). Zero where `result` is NaN,
+    and everywhere for compounds the kernels do not support (`pure_variant` None)."""
+    # pylint: disable = import-outside-toplevel
+    from .epcsaftpure_jax import pure_den_grad, pure_variant, pure_vp_grad
+
+    if pure_variant(parameters) is None:
+        return torch.zeros((states.shape[0], len(parameters)), dtype=torch.float64)
+    grad_fn = pure_den_grad if prop == "den" else pure_vp_grad
+    jac = np.asarray(
+        grad_fn(
+            parameters.astype(np.float64),
+            states.astype(np.float64),
+            result,
+            pure_variant(parameters),
+        )
+    )
+    return torch.from_numpy(np.where(np.isfinite(jac), jac, 0.0))
+
+
 # pylint: disable = abstract-method
 class DenFromTensor(torch.autograd.Function):
-    """Custom `torch` function to calculate pure component density with ePC-SAFT."""
+    """Custom `torch` function to calculate pure component density with ePC-SAFT.
+
+    The backward pass uses d rho / d para from `pure_den_grad`,
+    computed for all states in the forward pass when `para` requires grad.
+    """
 
     # pylint: disable = arguments-differ
     @staticmethod
     def forward(ctx, para: torch.Tensor, state: torch.Tensor) -> torch.Tensor:
-        parameters = para.cpu().numpy()
-        state = state.cpu().numpy()
-
-        ctx.parameters = parameters
-        ctx.state = state
-
-        result = np.zeros(state.shape[0])
+        parameters = para.detach().cpu().numpy()
+        state = state.detach().cpu().numpy()
 
-        for i, row in enumerate(state):
-            den = pure_den_feos(parameters, row)
-            result[i] = den
+        result = pure_den_feos_series(parameters, state)
+        if ctx.needs_input_grad[0]:
+            ctx.jac = _jacobian_from_jax("den", parameters, state, result).to(para)
         return torch.tensor(result)
 
     @staticmethod
     def backward(ctx, dg1: torch.Tensor):
-        grad_result = dg1
-        return grad_result, None
+        grad_para = (dg1[:, None].to(ctx.jac) * ctx.jac).sum(0)
+        return grad_para, None
 
 
 class VpFromTensor(torch.autograd.Function):
-    """Custom `torch` function to calculate pure component vapor pressure with ePC-SAFT."""
+    """Custom `torch` function to calculate pure component vapor pressure with ePC-SAFT.
+
+    The backward pass uses d p_sat / d para from `pure_vp_grad`,
+    computed for all states in the forward pass when `para` requires grad.
+    """
 
     # pylint: disable = arguments-differ
     @staticmethod
     def forward(ctx, para: torch.Tensor, state: torch.Tensor) -> torch.Tensor:
-        parameters = para.cpu().numpy()
-        state = state.cpu().numpy()
-
-        ctx.parameters = parameters
-        ctx.state = state
-
-        result = np.zeros(state.shape[0])
+        parameters = para.detach().cpu().numpy()
+        state = state.detach().cpu().numpy()
 
-        for i, row in enumerate(state):
-            vp = pure_vp_feos(parameters, row)
-            result[i] = vp
+        result = pure_vp_feos_curve(parameters, state)
+        if ctx.needs_input_grad[0]:
+            ctx.jac = _jacobian_from_jax("vp", parameters, state, result).to(para)
         return torch.tensor(result)
 
     @staticmethod
     def backward(ctx, dg1: torch.Tensor):
-        grad_result = dg1
-        return grad_result, None
+        grad_para = (dg1[:, None].to(ctx.jac) * ctx.jac).sum(0)
+        return grad_para, None
@@ -0,0 +1,59 @@
+"""Module for ahead-of-time compilation of the ePC-SAFT JAX kernels into the cache.
+
+Usage::
+
+    python -m gnnepcsaft.epcsaft.warmup --cache_dir=~/.cache/gnnepcsaft_jax
+"""
+
+import jax
+from absl import app, flags, logging
+
+from .compilation import (
+    PURE_VARIANTS,
+    SHAPE_BUCKETS,
+    compile_stats,
+    enable_compilation_cache,
+    warmup,
+)
+
+FLAGS = flags.FLAGS
+
+flags.DEFINE_string("cache_dir", None, "Directory of the compilation cache.")
+flags.DEFINE_list(
+    "targets", list(SHAPE_BUCKETS), "Callers to compile for: backends, bridge."
+)
+flags.DEFINE_list("kernels", ["den", "vp"], "Kernels to compile: den, vp.")
+flags.DEFINE_list("variants", list(PURE_VARIANTS), "Kernel variants to compile.")
+flags.DEFINE_list(
+    "buckets",
+    None,
+    "Shape buckets as molecules x states, e.g. 16x64, "
+    "instead of the ones of each target.",
+)
+flags.DEFINE_bool("x64", True, "Compile for float64.")
+
+
+def main(argv):
+    """Execution from command line"""
+    if len(argv) > 1:
+        raise app.UsageError("Too many command-line arguments.")
+
+    jax.config.update("jax_enable_x64", FLAGS.x64)
+    cache_dir = enable_compilation_cache(FLAGS.cache_dir)
+    if cache_dir is None:
+        logging.warning(
+            "no compilation cache set, kernels compile for this process only"
+        )
+    logging.info(f"compilation cache: {cache_dir}")
+
+    buckets = None
+    if FLAGS.buckets:
+        buckets = [
+            tuple(int(dim) for dim in bucket.split("x")) for bucket in FLAGS.buckets
+        ]
+    warmup(FLAGS.targets, FLAGS.kernels, FLAGS.variants, buckets)
+    logging.info(f"compile stats: {compile_stats()}")
+
+
+if __name__ == "__main__":
+    app.run(main)
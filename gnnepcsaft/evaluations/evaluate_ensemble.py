@@ -4,6 +4,7 @@ At `evalmodels.ipynb` a working example can be found.
 """
 
 import os.path as osp
+from functools import partial
 
 import ml_collections
 import torch
@@ -13,7 +14,9 @@ from ml_collections import config_flags
 from torch.nn import HuberLoss
 from torchmetrics import MeanAbsolutePercentageError
 
-from ..epcsaft import utils
+from ..epcsaft.backends import pure_den, pure_vp
+from ..epcsaft.parallel import run_jobs
+from ..epcsaft.status import SolverStatus
 from ..train.utils import (
     build_datasets_loaders,
     calc_deg,
@@ -25,8 +28,6 @@ device = torch.device("cpu")
 MODEL_DTYPE = torch.float64
 
 # pylint: disable=no-member
-pcsaft_den = utils.DenFromTensor.apply
-pcsaft_vp = utils.VpFromTensor.apply
 hloss = HuberLoss("mean")
 mape = MeanAbsolutePercentageError()
 
@@ -82,12 +83,14 @@ def evaluate(
         para_data=para_data,
         model_dict=model_dict,
         test="val",
+        max_workers=config.get("eos_workers"),
     )
     test = test_den(
         test_loader=test_loader,
         para_data=para_data,
         model_dict=model_dict,
         test="test",
+        max_workers=config.get("eos_workers"),
     )
     wandb.log(
         {
@@ -104,12 +107,14 @@ def evaluate(
         para_data=para_data,
         model_dict=model_dict,
         test="val",
+        max_workers=config.get("eos_workers"),
     )
     test = test_vp(
         test_loader=test_loader,
         para_data=para_data,
         model_dict=model_dict,
         test="test",
+        max_workers=config.get("eos_workers"),
     )
 
     wandb.log(
@@ -124,11 +129,11 @@ def evaluate(
     wandb.finish()
 
 
-# test fn
 @torch.no_grad()
-def test_den(test_loader, para_data, model_dict, test="test"):
-    "Evaluates density prediction."
-    total_loss = ([], [])
+def ensemble_jobs(test_loader, para_data, model_dict, test, prop):
+    """Jobs of (mean parameters predicted by the models, states) of the molecules
+    of the `test` ("test" or "val") split with `prop` ("rho" or "vp") data."""
+    jobs = []
     for graphs in test_loader:
         if test == "test":
             if graphs.InChI in para_data:
@@ -136,24 +141,39 @@ def test_den(test_loader, para_data, model_dict, test="test"):
         if test == "val":
             if graphs.InChI not in para_data:
                 continue
-        datapoints = graphs.rho.to(device, MODEL_DTYPE)
+        datapoints = getattr(graphs, prop).to(device, MODEL_DTYPE)
         if torch.all(datapoints == torch.zeros_like(datapoints)):
             continue
         graphs = graphs.to(device)
-        pred_para = []
-        for name in model_dict:
-            pred_params = model_dict[name](graphs)
-            pred_para += [pred_params]
+        pred_para = [model(graphs) for model in model_dict.values()]
         pred_para = torch.concat(pred_para, dim=0).mean(0).to(MODEL_DTYPE)
-        pred = pcsaft_den(pred_para, datapoints)
-        target = datapoints[:, -1]
+        jobs.append((pred_para.numpy(), datapoints.numpy()))
+    return jobs
+
+
+# test fn
+@torch.no_grad()
+def test_den(test_loader, para_data, model_dict, test="test", max_workers=None):
+    "Evaluates density prediction."
+    jobs = ensemble_jobs(test_loader, para_data, model_dict, test, "rho")
+
+    total_loss = ([], [])
+    results = run_jobs(partial(pure_den, return_status=True), jobs, max_workers)
+    for (_, datapoints), job in zip(jobs, results):
+        if job.error is not None:
+            logging.warning(f"density evaluation failed: {job.error}")
+            continue
+        pred = torch.from_numpy(job.result[0])
+        target = torch.from_numpy(datapoints[:, -1])
+        result_filter = torch.from_numpy(job.result[1] == SolverStatus.CONVERGED)
         # pylint: disable = not-callable
-        loss_mape = mape(pred, target)
-        loss_huber = hloss(pred, target)
+        loss_mape = mape(pred[result_filter], target[result_filter])
+        loss_huber = hloss(pred[result_filter], target[result_filter])
         wandb.log(
             {
                 "mape_den": loss_mape.item(),
                 "huber_den": loss_huber.item(),
+                "failed_den": 1.0 - result_filter.double().mean().item(),
             },
         )
         total_loss[0].append(loss_mape.item())
@@ -166,28 +186,19 @@ def test_den(test_loader, para_data, model_dict, test="test"):
 
 
 @torch.no_grad()
-def test_vp(test_loader, para_data, model_dict, test="test"):
+def test_vp(test_loader, para_data, model_dict, test="test", max_workers=None):
     "Evaluates vapor pressure prediction."
+    jobs = ensemble_jobs(test_loader, para_data, model_dict, test, "vp")
+
     total_loss = ([], [])
-    for graphs in test_loader:
-        if test == "test":
-            if graphs.InChI in para_data:
-                continue
-        if test == "val":
-            if graphs.InChI not in para_data:
-                continue
-        datapoints = graphs.vp.to(device, MODEL_DTYPE)
-        if torch.all(datapoints == torch.zeros_like(datapoints)):
+    results = run_jobs(partial(pure_vp, return_status=True), jobs, max_workers)
+    for (_, datapoints), job in zip(jobs, results):
+        if job.error is not None:
+            logging.warning(f"vapor pressure evaluation failed: {job.error}")
             continue
-        graphs = graphs.to(device)
-        pred_para = []
-        for model in model_dict.values():
-            pred_params = model(graphs)
-            pred_para.append(pred_params)
-        pred_para = torch.concat(pred_para, dim=0).mean(0).to(MODEL_DTYPE)
-        pred = pcsaft_vp(pred_para, datapoints)
-        target = datapoints[:, -1]
-        result_filter = ~torch.isnan(pred)
+        pred = torch.from_numpy(job.result[0])
+        target = torch.from_numpy(datapoints[:, -1])
+        result_filter = torch.from_numpy(job.result[1] == SolverStatus.CONVERGED)
         # pylint: disable = not-callable
         loss_mape = mape(pred[result_filter], target[result_filter])
         loss_huber = hloss(pred[result_filter], target[result_filter])
@@ -195,6 +206,7 @@ def test_vp(test_loader, para_data, model_dict, test="test"):
             {
                 "mape_vp": loss_mape.item(),
                 "huber_vp": loss_huber.item(),
+                "failed_vp": 1.0 - result_filter.double().mean().item(),
             },
         )
         if loss_mape.item() >= 0.9:
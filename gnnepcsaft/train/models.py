@@ -1,9 +1,11 @@
 """Module with all available Graph Neural Network models developed and used in the project"""
 
 import dataclasses
+from functools import partial
 
 import lightning as L
 import ml_collections
+import numpy as np
 import torch
 import torch.nn.functional as F
 from lightning.pytorch.utilities.types import STEP_OUTPUT, OptimizerLRScheduler
@@ -15,19 +17,22 @@ from torch_geometric.nn import BatchNorm, PNAConv, global_add_pool
 from torch_geometric.utils import add_self_loops
 from torchmetrics.functional import mean_absolute_percentage_error as mape
 
-from ..epcsaft import utils
+from ..epcsaft.backends import pure_den, pure_vp
+from ..epcsaft.epcsaftpure_jax import pure_variant
+from ..epcsaft.parallel import run_jobs, shutdown_pools
+from ..epcsaft.status import SolverStatus
+from ..epcsaft.torch_bridge import batch_den_from_tensor, batch_vp_from_tensor
 
 # from typing import Any
 
 
-pcsaft_den = utils.DenFromTensor.apply
-pcsaft_vp = utils.VpFromTensor.apply
 hloss = F.huber_loss
 
 
 @dataclasses.dataclass
 class PnaconvsParams:
     "Parameters for pna convolutions."
+
     propagation_depth: int
     pre_layers: int
     post_layers: int
@@ -40,6 +45,7 @@ class PnaconvsParams:
 @dataclasses.dataclass
 class ReadoutMLPParams:
     "Parameters for the MLP layers."
+
     num_mlp_layers: int
     num_para: int
     dropout: float = 0.0
@@ -150,6 +156,8 @@ class PNApcsaftL(L.LightningModule):
         self.model = PNAPCSAFT(
             config.hidden_dim, pna_params=pna_params, mlp_params=mlp_params
         )
+        # (parameters, rho, vp) collected during validation/test epochs
+        self.eos_jobs = []
 
     # pylint: disable=W0221
     def forward(
@@ -189,6 +197,7 @@ class PNApcsaftL(L.LightningModule):
 
     # pylint: disable = W0613
     def training_step(self, graphs, batch_idx) -> STEP_OUTPUT:
+        "Parameter MAPE, mixed with `eos_loss` when `eos_loss_weight` is set."
         target = graphs.para.view(-1, self.config.num_para)
         pred = self(graphs)
         loss_mape = mape(pred, target)
@@ -199,53 +208,150 @@ class PNApcsaftL(L.LightningModule):
             batch_size=target.shape[0],
             sync_dist=True,
         )
-        return loss_mape
+        eos_weight = self.config.get("eos_loss_weight", 0.0)
+        if eos_weight == 0.0:
+            return loss_mape
+        loss_eos = self.eos_loss(graphs, pred)
+        loss = (1.0 - eos_weight) * loss_mape + eos_weight * loss_eos
+        self.log_dict(
+            {"train_eos_mape": loss_eos, "train_loss": loss},
+            on_step=True,
+            batch_size=target.shape[0],
+            sync_dist=True,
+        )
+        return loss
+
+    def eos_loss(self, graphs, pred: torch.Tensor) -> torch.Tensor:
+        """Mean of the density and vapor pressure MAPE of the ThermoML states
+        of the batch (`rho` and `vp` of `ThermoMLStates`) with the predicted
+        parameters, differentiable through the JAX kernels of `torch_bridge`.
+        States where the solvers fail are left out and logged
+        as `train_failed_den` and `train_failed_vp`, and so are molecules
+        without a kernel variant (`pure_variant`), logged as `train_unsupported`."""
+        para = pred.to(torch.float64)
+        if "munanb" in graphs:
+            munanb = graphs.munanb.view(para.shape[0], -1).to(para)
+            para = torch.hstack([para, munanb])
+        supported = torch.as_tensor(
+            [pure_variant(row) is not None for row in para.detach().cpu().numpy()],
+            device=para.device,
+        )
+        self.log(
+            "train_unsupported",
+            1.0 - supported.to(torch.float64).mean(),
+            on_step=True,
+            batch_size=para.shape[0],
+            sync_dist=True,
+        )
+        losses = []
+        for prop, data, prop_fn in (
+            ("den", graphs.rho, batch_den_from_tensor),
+            ("vp", graphs.vp, batch_vp_from_tensor),
+        ):
+            states = data.to(torch.float64).view(para.shape[0], -1, 5)
+            mask = torch.any(states != 0, dim=-1) & supported[:, None]
+            if not torch.any(mask):
+                continue
+            pred_prop = prop_fn(para, states, mask)
+            result_filter = torch.isfinite(pred_prop)
+            self.log(
+                f"train_failed_{prop}",
+                1.0 - result_filter.sum() / mask.sum(),
+                on_step=True,
+                batch_size=para.shape[0],
+                sync_dist=True,
+            )
+            if torch.any(result_filter):
+                # pylint: disable = not-callable
+                losses.append(
+                    mape(pred_prop[result_filter], states[..., -1][result_filter])
+                )
+        if not losses:
+            return torch.zeros((), dtype=pred.dtype, device=pred.device)
+        return torch.stack(losses).mean().to(pred.dtype)
 
-    def validation_step(self, graphs, batch_idx) -> STEP_OUTPUT:
-        mape_den = 0.0
-        huber_den = 0.0
-        mape_vp = 0.0
-        huber_vp = 0.0
-        metrics_dict = {}
+    def on_validation_epoch_start(self) -> None:
+        "Resets the ePC-SAFT jobs collected by `validation_step`."
+        self.eos_jobs = []
 
+    def validation_step(self, graphs, batch_idx) -> STEP_OUTPUT:
+        "Collects the predicted parameters and states of the batch for `eos_metrics`."
         pred_para = self(graphs).squeeze().to(torch.float64)
         pred_para = torch.hstack([pred_para, graphs.munanb])
-        datapoints = graphs.rho.to(torch.float64).view(-1, 5)
-        if ~torch.all(datapoints == torch.zeros_like(datapoints)):
-            pred = pcsaft_den(pred_para, datapoints)
-            target = datapoints[:, -1].cpu()
-            # pylint: disable = not-callable
-            loss_mape = mape(pred, target)
-            loss_huber = hloss(pred, target, reduction="mean")
-            mape_den = loss_mape.item()
-            huber_den = loss_huber.item()
-            # self.log("mape_den", mape_den)
-            metrics_dict.update(
-                {
-                    "mape_den": mape_den,
-                    "huber_den": huber_den,
-                }
+        self.eos_jobs.append(
+            (
+                pred_para.cpu().numpy(),
+                graphs.rho.to(torch.float64).view(-1, 5).cpu().numpy(),
+                graphs.vp.to(torch.float64).view(-1, 5).cpu().numpy(),
             )
+        )
 
-        datapoints = graphs.vp.to(torch.float64).view(-1, 5)
-        if ~torch.all(datapoints == torch.zeros_like(datapoints)):
-            pred = pcsaft_vp(pred_para, datapoints)
-            target = datapoints[:, -1].cpu()
-            result_filter = ~torch.isnan(pred)
-            # pylint: disable = not-callable
-            loss_mape = mape(pred[result_filter], target[result_filter])
-            loss_huber = hloss(pred[result_filter], target[result_filter])
-            if loss_mape.item() < 0.5:
-                mape_vp = loss_mape.item()
-                huber_vp = loss_huber.item()
-                metrics_dict.update(
-                    {
-                        "mape_vp": mape_vp,
-                        "huber_vp": huber_vp,
-                    }
-                )
-        self.log_dict(metrics_dict, on_step=True, batch_size=1, sync_dist=True)
-        return metrics_dict
+    def on_validation_epoch_end(self) -> None:
+        "Logs the ePC-SAFT metrics of the epoch, see `eos_metrics`."
+        self.log_dict(self.eos_metrics(), batch_size=1, sync_dist=True)
+
+    def on_test_epoch_start(self) -> None:
+        "Same as `on_validation_epoch_start`."
+        self.on_validation_epoch_start()
 
     def test_step(self, graphs, batch_idx) -> STEP_OUTPUT:
+        "Same as `validation_step`."
         return self.validation_step(graphs, batch_idx)
+
+    def on_test_epoch_end(self) -> None:
+        "Same as `on_validation_epoch_end`."
+        self.on_validation_epoch_end()
+
+    def on_fit_end(self) -> None:
+        "Shuts down the process pools of `eos_metrics`."
+        shutdown_pools()
+
+    def on_test_end(self) -> None:
+        "Shuts down the process pools of `eos_metrics`."
+        shutdown_pools()
+
+    def eos_metrics(self) -> dict:
+        """Evaluates ePC-SAFT for all molecules collected in the epoch
+        with a process pool and averages the metrics per molecule.
+        `failed_den` and `failed_vp` are the fractions of states
+        where the solvers did not converge. Repeated states are solved once,
+        compared after rounding to `eos_state_digits` significant digits
+        when set, see `backends.unique_states`."""
+        max_workers = self.config.get("eos_workers")
+        digits = self.config.get("eos_state_digits")
+        metrics = {"mape_den": [], "huber_den": [], "mape_vp": [], "huber_vp": []}
+        metrics.update(failed_den=[], failed_vp=[])
+
+        den_jobs = [(para, rho) for para, rho, _ in self.eos_jobs if np.any(rho != 0)]
+        prop_fn = partial(pure_den, return_status=True, digits=digits)
+        results = run_jobs(prop_fn, den_jobs, max_workers)
+        for (_, states), job in zip(den_jobs, results):
+            if job.error is not None:
+                continue
+            pred, status = job.result
+            result_filter = torch.from_numpy(status == SolverStatus.CONVERGED)
+            metrics["failed_den"].append(1.0 - result_filter.double().mean().item())
+            pred = torch.from_numpy(pred)[result_filter]
+            target = torch.from_numpy(states[:, -1])[result_filter]
+            # pylint: disable = not-callable
+            metrics["mape_den"].append(mape(pred, target).item())
+            metrics["huber_den"].append(hloss(pred, target, reduction="mean").item())
+
+        vp_jobs = [(para, vp) for para, _, vp in self.eos_jobs if np.any(vp != 0)]
+        prop_fn = partial(pure_vp, return_status=True, digits=digits)
+        results = run_jobs(prop_fn, vp_jobs, max_workers)
+        for (_, states), job in zip(vp_jobs, results):
+            if job.error is not None:
+                continue
+            pred, status = job.result
+            result_filter = torch.from_numpy(status == SolverStatus.CONVERGED)
+            metrics["failed_vp"].append(1.0 - result_filter.double().mean().item())
+            pred = torch.from_numpy(pred)[result_filter]
+            target = torch.from_numpy(states[:, -1])[result_filter]
+            # pylint: disable = not-callable
+            loss_mape = mape(pred, target)
+            if loss_mape.item() < 0.5:
+                metrics["mape_vp"].append(loss_mape.item())
+                metrics["huber_vp"].append(hloss(pred, target).item())
+
+        return {name: float(np.mean(value)) for name, value in metrics.items() if value}
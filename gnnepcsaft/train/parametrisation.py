@@ -12,7 +12,7 @@ from scipy.optimize import least_squares
 from ..data.graphdataset import ThermoMLDataset
 
 # pylint: disable = no-name-in-module
-from ..epcsaft.utils import pure_den_pcsaft, pure_vp_teqp
+from ..epcsaft.backends import pure_den, pure_vp
 from .utils import mape
 
 path = osp.join("data", "thermoml")
@@ -36,15 +36,16 @@ def parametrisation(weight_decay):
         n = rho.shape[0] + vp.shape[0]
         l2penalty = np.sum((parameters / x_scale) ** 2) * weight_decay / n
 
+        # failed states count as 100 % error, least squares needs finite residuals
         if ~np.all(rho == np.zeros_like(rho)):
-            for state in rho:
-                den = pure_den_pcsaft(parameters, state)
-                loss += [((state[-1] - den) / state[-1]) * np.sqrt(2)]
+            den = pure_den(parameters, rho)
+            rel_err = np.nan_to_num((rho[:, -1] - den) / rho[:, -1], nan=1.0)
+            loss += (rel_err * np.sqrt(2)).tolist()
 
         if ~np.all(vp == np.zeros_like(vp)):
-            for state in vp:
-                vppred = pure_vp_teqp(parameters, state)
-                loss += [((state[-1] - vppred) / state[-1]) * np.sqrt(3)]
+            vppred = pure_vp(parameters, vp)
+            rel_err = np.nan_to_num((vp[:, -1] - vppred) / vp[:, -1], nan=1.0)
+            loss += (rel_err * np.sqrt(3)).tolist()
 
         loss = np.asarray(loss).flatten() + np.sqrt(l2penalty)
 
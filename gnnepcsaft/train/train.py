@@ -20,12 +20,14 @@ from ray.train.torch import TorchTrainer
 from torch_geometric.loader import DataLoader
 
 from ..configs.configs_parallel import get_configs
+from ..epcsaft.compilation import enable_compilation_cache
+from ..epcsaft.dtypes import set_precision
+from ..epcsaft.sharding import set_host_device_count
 from . import models
 from .utils import (
     CustomRayTrainReportCallback,
     EpochTimer,
-    build_test_dataset,
-    build_train_dataset,
+    build_datasets,
     calc_deg,
     create_model,
 )
@@ -54,23 +56,11 @@ def ltrain_and_evaluate(config: ml_collections.ConfigDict, workdir: str, dataset
       dataset: Train dataset name (ramirez or esper).
     """
     job_type = config.job_type
+    if config.get("eos_loss_weight", 0.0) > 0.0:
+        # the EoS loss runs the JAX kernels in this precision
+        set_precision(config.eos_precision)
     # Dataset building
-    # transform = None if job_type == "train" else VpOff()
-    train_dataset = build_train_dataset(workdir, dataset)
-    tml_dataset, para_data = build_test_dataset(
-        workdir,
-        train_dataset,
-    )
-    test_idx = []
-    val_idx = []
-    # separate test and val dataset
-    for idx, graph in enumerate(tml_dataset):
-        if graph.InChI in para_data:
-            val_idx.append(idx)
-        else:
-            test_idx.append(idx)
-    test_dataset = tml_dataset[test_idx]
-    val_dataset = tml_dataset[val_idx]
+    train_dataset, val_dataset, test_dataset = build_datasets(config, workdir, dataset)
     train_loader = DataLoader(
         train_dataset,
         batch_size=config.batch_size,
@@ -315,6 +305,9 @@ def main(argv):
     if len(argv) > 1:
         raise app.UsageError("Too many command-line arguments.")
 
+    # opt-in host CPU devices and compilation cache of the JAX EoS kernels
+    set_host_device_count()
+    enable_compilation_cache()
     logging.info("Calling train and evaluate!")
     torch.set_float32_matmul_precision("medium")
 
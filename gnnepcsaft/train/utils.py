@@ -3,7 +3,7 @@
 import os.path as osp
 import time
 from tempfile import TemporaryDirectory
-from typing import Any
+from typing import Any, Optional
 
 import ml_collections
 import numpy as np
@@ -15,11 +15,12 @@ from ray import train
 from ray.train import Checkpoint
 from torch.optim.lr_scheduler import CosineAnnealingWarmRestarts, ReduceLROnPlateau
 from torch_geometric.loader import DataLoader
-from torch_geometric.transforms import BaseTransform
+from torch_geometric.transforms import BaseTransform, Compose
 from torch_geometric.utils import degree
 
-from ..data.graphdataset import Esper, Ramirez, ThermoMLDataset
-from ..epcsaft.utils import pure_den_feos, pure_vp_feos
+from ..data.graphdataset import Esper, Ramirez, ThermoMLDataset, get_padded_array
+from ..epcsaft.backends import pure_den, pure_vp
+from ..epcsaft.status import SolverStatus
 from . import models
 
 
@@ -134,13 +135,10 @@ def mape(parameters: np.ndarray, rho: np.ndarray, vp: np.ndarray, mean: bool = T
         parameters = np.concatenate([parameters, zeros], axis=0)
     pred_mape = [0.0]
     if ~np.all(rho == np.zeros_like(rho)):
-        pred_mape = []
-        for state in rho:
-            den = pure_den_feos(parameters, state)
-            mape_den = np.abs((state[-1] - den) / state[-1])
-            if mape_den > 1:  # against algorithm fail
-                continue
-            pred_mape += [mape_den]
+        den, status = pure_den(parameters, rho, return_status=True)
+        mape_den = np.abs((rho[:, -1] - den) / rho[:, -1])
+        mape_den = mape_den[status == SolverStatus.CONVERGED]
+        pred_mape = mape_den[mape_den <= 1].tolist()  # against algorithm fail
 
     den = np.asarray(pred_mape)
     if mean:
@@ -148,16 +146,11 @@ def mape(parameters: np.ndarray, rho: np.ndarray, vp: np.ndarray, mean: bool = T
 
     pred_mape = [0.0]
     if ~np.all(vp == np.zeros_like(vp)):
-        pred_mape = []
-        for state in vp:
-            try:
-                vp_pred = pure_vp_feos(parameters, state)
-                mape_vp = np.abs((state[-1] - vp_pred) / state[-1])
-            except (AssertionError, RuntimeError):
-                continue
-            if mape_vp > 1:  # against algorithm fail
-                continue
-            pred_mape += [mape_vp]
+        vp_pred, status = pure_vp(parameters, vp, return_status=True)
+        mape_vp = np.abs((vp[:, -1] - vp_pred) / vp[:, -1])
+        mape_vp = mape_vp[status == SolverStatus.CONVERGED]
+        # against algorithm fail
+        pred_mape = mape_vp[mape_vp <= 1].tolist()
 
     vp = np.asarray(pred_mape)
     if mean:
@@ -171,17 +164,13 @@ def rhovp_data(parameters: np.ndarray, rho: np.ndarray, vp: np.ndarray):
     parameters = np.abs(parameters)
     den = []
     if ~np.all(rho == np.zeros_like(rho)):
-        for state in rho:
-            den += [pure_den_feos(parameters, state)]
+        den = pure_den(parameters, rho)
     den = np.asarray(den)
 
     vpl = []
     if ~np.all(vp == np.zeros_like(vp)):
-        for state in vp:
-            try:
-                vpl += [pure_vp_feos(parameters, state)]
-            except (AssertionError, RuntimeError):
-                continue
+        vpl, status = pure_vp(parameters, vp, return_status=True)
+        vpl = vpl[status == SolverStatus.CONVERGED]
     vp = np.asarray(vpl)
 
     return den, vp
@@ -257,6 +246,84 @@ class Munanb(BaseTransform):
         return data
 
 
+class ThermoMLStates(BaseTransform):
+    """To add ThermoML density and vapor pressure states to the train dataset,
+    `pad_size` states of each randomly sampled (repeated when fewer) at every
+    access, as in `ThermoMLPadded`, or all of them when `pad_size` is None.
+    Molecules without data get zero states."""
+
+    def __init__(self, states_data: dict, pad_size: Optional[int] = None) -> None:
+        self.states_data = states_data
+        self.pad_size = pad_size
+
+    def forward(self, data: Any) -> Any:
+        "Replaces `rho` and `vp` of `data` with the states of its InChI."
+        no_data = torch.zeros((1, 5), dtype=torch.float64)
+        rho, vp = self.states_data.get(data.InChI, (no_data, no_data))
+        rho, vp = rho.to(torch.float64), vp.to(torch.float64)
+        if self.pad_size is not None:
+            rho = get_padded_array(rho, self.pad_size)
+            vp = get_padded_array(vp, self.pad_size)
+        data.rho, data.vp = rho, vp
+        return data
+
+
+def build_thermoml_states(workdir) -> dict:
+    "ThermoML (rho, vp) states of each InChI for `ThermoMLStates`."
+    tml_dataset = ThermoMLDataset(osp.join(workdir, "data/thermoml"))
+    return {graph.InChI: (graph.rho, graph.vp) for graph in tml_dataset}
+
+
+def split_thermoml_states(states_data: dict, holdout: float, seed: int = 0):
+    """Splits the (rho, vp) states of each InChI of `build_thermoml_states`
+    in a random `holdout` fraction of each, for validation, and the rest,
+    for the train loss. Empty parts are a zero state (no data)."""
+    generator = torch.Generator().manual_seed(seed)
+    no_data = torch.zeros((1, 5), dtype=torch.float64)
+    loss_data, val_data = {}, {}
+    for inchi, prop_states in states_data.items():
+        loss_states, val_states = [], []
+        for states in prop_states:
+            perm = torch.randperm(states.shape[0], generator=generator)
+            num_val = round(holdout * states.shape[0])
+            val_states.append(states[perm[:num_val]] if num_val > 0 else no_data)
+            loss_states.append(
+                states[perm[num_val:]] if num_val < states.shape[0] else no_data
+            )
+        loss_data[inchi], val_data[inchi] = tuple(loss_states), tuple(val_states)
+    return loss_data, val_data
+
+
+def build_datasets(config: ml_collections.ConfigDict, workdir: str, dataset: str):
+    """Builds the train, validation and test datasets.
+
+    With `eos_loss_weight`, the ThermoML states of each molecule are split
+    with `split_thermoml_states`: the train loss uses `ThermoMLStates` of one
+    part and the validation dataset the other (`eos_holdout`), so the
+    validation metrics are not on states trained on."""
+    transform, val_transform = None, None
+    if config.get("eos_loss_weight", 0.0) > 0.0:
+        loss_data, val_data = split_thermoml_states(
+            build_thermoml_states(workdir), config.eos_holdout
+        )
+        transform = ThermoMLStates(loss_data, config.eos_states)
+        val_transform = ThermoMLStates(val_data)
+    train_dataset = build_train_dataset(workdir, dataset, transform)
+    tml_dataset, para_data = build_test_dataset(workdir, train_dataset)
+    test_idx = []
+    val_idx = []
+    # separate test and val dataset
+    for idx, graph in enumerate(tml_dataset):
+        if graph.InChI in para_data:
+            val_idx.append(idx)
+        else:
+            test_idx.append(idx)
+    val_dataset = tml_dataset[val_idx]
+    if val_transform is not None:
+        val_dataset.transform = Compose([val_dataset.transform, val_transform])
+    return train_dataset, val_dataset, tml_dataset[test_idx]
+
+
 def build_test_dataset(workdir, train_dataset):
     "Builds test dataset."
 
@@ -0,0 +1,6 @@
+"Test configuration."
+
+import jax
+
+# feos computes in double precision, so do the JAX kernels in the tests
+jax.config.update("jax_enable_x64", True)
@@ -0,0 +1,101 @@
+"""Tests of the ePC-SAFT backends of `epcsaft.backends` against feos."""
+
+import numpy as np
+import pytest
+
+from gnnepcsaft.epcsaft import backends, utils
+from gnnepcsaft.epcsaft.status import SolverStatus, status_counts
+
+# (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb)
+PARAMETERS = {
+    "non-associating": [2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    "associating": [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0],
+    "polar": [2.5, 3.6, 270.0, 0.0, 0.0, 1.5, 0.0, 0.0],
+}
+# (T, P, phase, ..., y), liquid states
+STATES = np.asarray(
+    [
+        [250.0, 1.0e5, 1.0, 0.0, 1.0e5],
+        [280.0, 1.0e6, 1.0, 0.0, 1.0e5],
+        [300.0, 5.0e6, 1.0, 0.0, 1.0e5],
+    ]
+)
+
+
+@pytest.mark.parametrize("compound", list(PARAMETERS))
+def test_backends_match_feos(compound):
+    "Density and vapor pressure of the default backends against feos."
+    para = np.asarray(PARAMETERS[compound])
+    den, status = backends.pure_den(para, STATES, return_status=True)
+    vp = backends.pure_vp(para, STATES)
+    np.testing.assert_allclose(den, utils.pure_den_feos_batch(para, STATES), rtol=1e-5)
+    np.testing.assert_allclose(vp, utils.pure_vp_feos_curve(para, STATES), rtol=1e-5)
+    assert np.all(status == SolverStatus.CONVERGED)
+
+
+def test_backend_order():
+    "Benchmarked backends within the deviation gate come first, fastest first."
+    benchmark = {
+        "den": {
+            "teqp": {"states_per_s": 10.0, "p99_deviation": 1e-8},
+            "pcsaft": {"states_per_s": 100.0, "p99_deviation": 1e-6},
+            "jax": {"states_per_s": 1000.0, "p99_deviation": 1e-2},
+            # no state solved, so no deviation
+            "feos": {"states_per_s": 1e4},
+        }
+    }
+    assert backends.backend_order("den", benchmark) == ("pcsaft", "teqp", "feos")
+    assert backends.backend_order("vp", benchmark) == backends.DEFAULT_ORDER["vp"]
+
+
+def test_density_status():
+    "States without a density root are NaN with NO_ROOT, not exceptions."
+    para = np.asarray(PARAMETERS["non-associating"])
+    states = np.vstack([STATES[:1], STATES[:1], STATES[:1]])
+    states[1, 1], states[2, 1] = 1.0e12, np.nan
+    den, status = backends.pure_den(para, states, ("jax",), return_status=True)
+    np.testing.assert_allclose(den[0], utils.pure_den_feos(para, STATES[0]), rtol=1e-5)
+    assert np.all(np.isnan(den[1:]))
+    np.testing.assert_array_equal(
+        status, [SolverStatus.CONVERGED, SolverStatus.NO_ROOT, SolverStatus.NO_ROOT]
+    )
+    # feos solves 1e12 Pa, but has no density at NaN pressure
+    den, status = backends.pure_den(para, states, ("feos",), return_status=True)
+    assert np.isnan(den[2]) and status[2] == SolverStatus.NO_ROOT
+    assert status_counts(status)["NO_ROOT"] == 1
+
+
+def test_above_critical_not_solved(monkeypatch):
+    "Vapor pressure states above the critical temperature never reach a backend."
+    para = np.asarray(PARAMETERS["non-associating"])
+    states = np.vstack([STATES, [[2000.0, 1.0e5, 0.0, 0.0, 1.0e5]]])
+    calls = []
+
+    def feos_vp(parameters, states):
+        calls.append(states)
+        return utils.pure_vp_feos_curve(parameters, states, return_status=True)
+
+    # pylint: disable = protected-access
+    monkeypatch.setitem(backends._backends["vp"], "feos", feos_vp)
+    vp, status = backends.pure_vp(para, states, ("feos",), return_status=True)
+    assert len(calls) == 1 and len(calls[0]) == STATES.shape[0]
+    np.testing.assert_allclose(vp[:-1], utils.pure_vp_feos_curve(para, STATES))
+    assert np.isnan(vp[-1]) and status[-1] == SolverStatus.ABOVE_CRITICAL
+
+
+def test_repeated_states_solved_once():
+    "Repeated states are solved once and get the values of their distinct state."
+    para = np.asarray(PARAMETERS["non-associating"])
+    states = STATES[[0, 1, 0, 2, 1]]
+    index, inverse = backends.unique_states("den", states)
+    assert len(index) == STATES.shape[0]
+    np.testing.assert_array_equal(states[index][inverse], states)
+    np.testing.assert_allclose(
+        backends.pure_den(para, states),
+        utils.pure_den_feos_batch(para, STATES)[[0, 1, 0, 2, 1]],
+        rtol=1e-5,
+    )
+    # vapor pressures only depend on T, and T equal after rounding are one state
+    states = np.vstack([STATES, STATES[:1] * [1 + 1e-9, 2, 0, 1, 1]])
+    index, inverse = backends.unique_states("vp", states, digits=6)
+    assert len(index) == STATES.shape[0] and inverse[-1] == inverse[0]
@@ -0,0 +1,42 @@
+"""Tests of the backend benchmark of `epcsaft.benchmark`."""
+
+import numpy as np
+
+from gnnepcsaft.epcsaft import benchmark
+from gnnepcsaft.epcsaft.status import SolverStatus
+
+STATES = np.zeros((2, 5))
+# two molecules of two states, the second unsupported by "teqp"
+JOBS = [(np.zeros(8), STATES), (np.ones(8), STATES)]
+RESULTS = {
+    "feos": (
+        np.asarray([1.0, 2.0, 3.0, 4.0]),
+        [SolverStatus.CONVERGED] * 4,
+        [1.0, 1.0],
+    ),
+    "teqp": (
+        np.asarray([1.0, np.nan, np.nan, np.nan]),
+        [SolverStatus.CONVERGED, SolverStatus.NO_ROOT] + [SolverStatus.UNSUPPORTED] * 2,
+        [0.5, 0.001],
+    ),
+}
+
+
+def fake_time_backend(_prop, name, _jobs):
+    "Fixed predictions, status and latencies of each backend."
+    pred, status, latencies = RESULTS[name]
+    return pred, np.asarray(status, dtype=np.int8), latencies, 0.0
+
+
+def test_rates_over_attempted_states(monkeypatch):
+    "Throughput and failure rate leave out the unsupported states."
+    monkeypatch.setattr(benchmark, "time_backend", fake_time_backend)
+    results = benchmark.benchmark_property("den", JOBS, ["teqp"])
+    assert results["feos"]["states_per_s"] == 2.0
+    assert results["feos"]["unsupported_rate"] == 0.0
+    teqp = results["teqp"]
+    assert teqp["states_per_s"] == 4.0
+    assert teqp["p50_ms"] == teqp["p99_ms"] == 500.0
+    assert teqp["failure_rate"] == 0.5
+    assert teqp["unsupported_rate"] == 0.5
+    assert teqp["max_deviation"] == 0.0
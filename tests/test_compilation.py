@@ -0,0 +1,42 @@
+"""Tests of the warm-up of `epcsaft.compilation`."""
+
+import numpy as np
+import torch
+
+from gnnepcsaft.epcsaft import backends
+from gnnepcsaft.epcsaft.compilation import (
+    PURE_VARIANTS,
+    compile_stats,
+    reset_compile_stats,
+    warmup,
+)
+from gnnepcsaft.epcsaft.epcsaftpure_jax import pure_variant
+from gnnepcsaft.epcsaft.torch_bridge import batch_den_from_tensor
+
+PARA = np.asarray(PURE_VARIANTS["nonpolar"])
+STATES = np.asarray(
+    [[250, 1e5, 1, 0, 1e5], [280, 1e6, 1, 0, 1e5], [300, 5e6, 1, 0, 1e5]]
+)
+
+
+def test_variant_parameters():
+    "Each warm-up parameter vector runs its own variant."
+    for variant, para in PURE_VARIANTS.items():
+        assert pure_variant(para) == variant
+
+
+def test_no_compiles_after_warmup():
+    "Calls of the backends and of the Torch bridge reuse the warm-up executables."
+    warmup(("backends",), ("den",), ("nonpolar",), [(1, 4)])
+    warmup(("bridge",), ("den",), ("nonpolar",), [(2, 4)])
+    reset_compile_stats()
+
+    den, _ = backends.get_backend("den", "jax")(PARA, STATES)
+    assert np.all(np.isfinite(den))
+
+    para = torch.tensor(np.tile(PARA, (2, 1)), requires_grad=True)
+    states = torch.tensor(np.tile(np.vstack([STATES, np.zeros(5)]), (2, 1, 1)))
+    den = batch_den_from_tensor(para, states, torch.any(states != 0, dim=-1))
+    den.nansum().backward()
+    assert torch.all(torch.isfinite(para.grad))
+    assert compile_stats()["compiles"] == 0
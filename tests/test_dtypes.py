@@ -0,0 +1,75 @@
+"""Tests of the float32 precision mode of the JAX kernels, see `epcsaft.dtypes`."""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from gnnepcsaft.epcsaft.dtypes import cast_precision
+from gnnepcsaft.epcsaft.epcsaftpure_jax import batch_pure_den, batch_pure_dispatch
+
+PARA = np.asarray([[2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0]])
+# (T, P, phase, ..., y), liquid states
+STATES = np.asarray(
+    [
+        [
+            [250.0, 1.0e5, 1.0, 0.0, 1.0e5],
+            [280.0, 1.0e6, 1.0, 0.0, 1.0e5],
+            [300.0, 5.0e6, 1.0, 0.0, 1.0e5],
+            [320.0, 1.0e5, 0.0, 0.0, 1.0e5],
+        ]
+    ]
+)
+MASK = np.ones(STATES.shape[:2], dtype=bool)
+
+# x64 is fixed once JAX starts and the tests enable it, so float32 runs in a new process
+SCRIPT = """
+import json
+import sys
+
+import numpy as np
+
+from gnnepcsaft.epcsaft.dtypes import default_precision, set_precision
+
+set_precision("float32")
+
+from gnnepcsaft.epcsaft.epcsaftpure_jax import batch_pure_den, batch_pure_dispatch
+
+para, states = (np.asarray(array) for array in json.load(sys.stdin))
+den = batch_pure_dispatch(batch_pure_den, para, states, np.ones(states.shape[:2], bool))
+print(json.dumps([default_precision(), str(den.dtype), den.tolist()]))
+"""
+
+
+def test_float32_matches_float64():
+    "float32 densities of one call agree with float64 to its precision."
+    den32 = batch_pure_dispatch(batch_pure_den, PARA, STATES, MASK, "float32")
+    den64 = batch_pure_dispatch(batch_pure_den, PARA, STATES, MASK, "float64")
+    assert den32.dtype == np.float32 and den64.dtype == np.float64
+    np.testing.assert_allclose(den32, den64, rtol=1e-4)
+
+
+def test_unknown_precision():
+    "Only float64 and float32 are selectable."
+    with pytest.raises(ValueError):
+        cast_precision("float16", PARA)
+
+
+def test_float32_process():
+    "A float32 process computes in float32 without x64."
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        input=json.dumps([PARA.tolist(), STATES.tolist()]),
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    precision, dtype, den = json.loads(out.stdout.splitlines()[-1])
+    assert precision == dtype == "float32"
+    den64 = batch_pure_dispatch(batch_pure_den, PARA, STATES, MASK, "float64")
+    np.testing.assert_allclose(den, den64, rtol=1e-4)
@@ -0,0 +1,42 @@
+"""Tests of the ePC-SAFT Helmholtz energy terms of `epcsaft.epcsaft_jax`."""
+
+import jax
+import jax.numpy as jnp
+import numpy as np
+
+from gnnepcsaft.epcsaft.epcsaft_jax import xa_find, xa_newton, xa_pure
+
+DELTA_IJ = jnp.asarray([[2.0e-3, 1.0e-3], [1.0e-3, 5.0e-4]])  # m^3 / mol
+DEN = 1.0e4  # mol / m^3
+X = jnp.asarray([[0.3], [0.7]])
+
+
+def test_xa_newton_mixture():
+    "Newton XA of a mixture is the fixed point of the mass action law."
+    xa = xa_newton(DELTA_IJ, DEN, X)
+    np.testing.assert_allclose(xa, xa_find(xa, DELTA_IJ, DEN, X), rtol=1e-10)
+    xa_fixed_point = jnp.ones_like(xa)
+    for _ in range(500):
+        xa_fixed_point = 0.5 * (
+            xa_fixed_point + xa_find(xa_fixed_point, DELTA_IJ, DEN, X)
+        )
+    np.testing.assert_allclose(xa, xa_fixed_point, rtol=1e-8)
+
+
+def test_xa_newton_pure():
+    "For one component, Newton XA is the analytic `xa_pure`."
+    delta_ij, x = DELTA_IJ[:1, :1], X[:1] / X[0]
+    np.testing.assert_allclose(
+        xa_newton(delta_ij, DEN, x), xa_pure(delta_ij, DEN), rtol=1e-10
+    )
+
+
+def test_xa_newton_derivative():
+    "Implicit derivative of XA against central differences in the density."
+
+    def xa_sum(den):
+        return jnp.sum(xa_newton(DELTA_IJ, den, X))
+
+    step = 1e-3 * DEN
+    fd = (xa_sum(DEN + step) - xa_sum(DEN - step)) / (2 * step)
+    np.testing.assert_allclose(jax.grad(xa_sum)(DEN), fd, rtol=1e-5)
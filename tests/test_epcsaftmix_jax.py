@@ -0,0 +1,37 @@
+"""Tests of the mixture phase equilibria of `epcsaft.epcsaftmix_jax`."""
+
+import numpy as np
+
+# pylint: disable = E0401,E0611
+from feos.eos import EquationOfState, PhaseEquilibrium
+from feos.pcsaft import PcSaftParameters, PcSaftRecord
+from feos.si import KELVIN, PASCAL
+
+# pylint: enable = E0401,E0611
+from gnnepcsaft.epcsaft.epcsaftmix_jax import pxy_diagram
+
+# (m, sigma, e) of a binary mixture without association and dipoles
+COMPONENTS = np.asarray([[2.0, 3.5, 250.0], [1.5, 3.2, 200.0]])
+T = 250.0  # K
+
+
+def test_pxy_diagram_matches_feos():
+    "Bubble pressures and vapor compositions against feos `bubble_point`."
+    x1 = np.asarray([0.2, 0.5, 0.8])
+    params = {
+        "m": COMPONENTS[:, :1],
+        "s": COMPONENTS[:, 1:2],
+        "e": COMPONENTS[:, 2:],
+        "k_ij": np.zeros((2, 2)),
+        "l_ij": np.zeros((2, 2)),
+    }
+    res = pxy_diagram(x1, T, params)
+    records = [PcSaftRecord(m=m, sigma=s, epsilon_k=e) for m, s, e in COMPONENTS]
+    eos = EquationOfState.pcsaft(PcSaftParameters.from_model_records(records))
+    for i, x1_i in enumerate(x1):
+        vle = PhaseEquilibrium.bubble_point(
+            eos, T * KELVIN, np.asarray([x1_i, 1.0 - x1_i])
+        )
+        assert res.converged[i]
+        np.testing.assert_allclose(res.p[i], vle.vapor.pressure() / PASCAL, rtol=1e-6)
+        np.testing.assert_allclose(res.y[i], vle.vapor.molefracs, rtol=1e-6)
@@ -0,0 +1,58 @@
+"""Tests of the single-state property kernels of `epcsaft.epcsaftprops_jax`."""
+
+import numpy as np
+
+# pylint: disable = E0401,E0611
+from feos.eos import Contributions, State
+from feos.si import JOULE, KELVIN, METER, MOL, PASCAL
+
+# pylint: enable = E0401,E0611
+
+from gnnepcsaft.epcsaft import utils
+from gnnepcsaft.epcsaft.epcsaftprops_jax import (
+    pcsaft_derivs,
+    pcsaft_fugcoef,
+    pcsaft_hres,
+    pcsaft_props,
+    pcsaft_Z,
+)
+from gnnepcsaft.epcsaft.epcsaftpure_jax import X_PURE, pure_params
+
+ASSOC_PARA = np.asarray([1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0])
+STATE = np.asarray([280.0, 1.0e6, 1.0, 0.0, 1.0e5])
+
+
+def test_pcsaft_props_matches_single_properties():
+    "The fused residual properties match the single property kernels."
+    params = pure_params(ASSOC_PARA, "assoc")
+    t, rho = 280.0, 3.0e4
+    props = pcsaft_props(X_PURE, t, rho, params)
+    np.testing.assert_allclose(props.Z, pcsaft_Z(X_PURE, t, rho, params), rtol=1e-10)
+    np.testing.assert_allclose(
+        props.fugcoef, pcsaft_fugcoef(X_PURE, t, rho, params).squeeze(), rtol=1e-10
+    )
+    np.testing.assert_allclose(
+        props.hres, pcsaft_hres(X_PURE, t, rho, params), rtol=1e-10
+    )
+
+
+def test_pcsaft_derivs_matches_feos():
+    "Residual heat capacities and pressure derivatives against feos."
+    state = State(
+        utils.pure_eos_feos(ASSOC_PARA),
+        temperature=STATE[0] * KELVIN,
+        pressure=STATE[1] * PASCAL,
+    )
+    rho = state.density * (METER**3) / MOL
+    derivs = pcsaft_derivs(X_PURE, STATE[0], rho, pure_params(ASSOC_PARA, "assoc"))
+    heat_capacity = JOULE / MOL / KELVIN
+    ref = {
+        "cv_res": state.molar_isochoric_heat_capacity(Contributions.Residual)
+        / heat_capacity,
+        "cp_res": state.molar_isobaric_heat_capacity(Contributions.Residual)
+        / heat_capacity,
+        "dp_dt": state.dp_dt() / (PASCAL / KELVIN),
+        "dp_drho": state.dp_drho() / (PASCAL * METER**3 / MOL),
+    }
+    for name, value in ref.items():
+        np.testing.assert_allclose(getattr(derivs, name), value, rtol=1e-6)
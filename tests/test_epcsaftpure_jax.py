@@ -0,0 +1,135 @@
+"""Tests of the batched pure component kernels of `epcsaft.epcsaftpure_jax`."""
+
+import numpy as np
+import pytest
+
+# pylint: disable = E0401,E0611
+from feos.eos import Contributions, PhaseEquilibrium
+from feos.si import JOULE, KELVIN, MOL
+
+# pylint: enable = E0401,E0611
+
+from gnnepcsaft.epcsaft import utils
+from gnnepcsaft.epcsaft.epcsaftpure_jax import (
+    batch_pure_den,
+    batch_pure_den_result,
+    batch_pure_dispatch,
+    batch_pure_vp,
+    pcsaft_hvap,
+    pcsaft_VP,
+    pure_den_grad,
+    pure_params,
+    pure_variant,
+    pure_vp_grad,
+    X_PURE,
+)
+from gnnepcsaft.epcsaft.status import SolverStatus
+
+# (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb)
+PARAMETERS = {
+    "non-associating": [2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    "associating": [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0],
+    "polar": [2.5, 3.6, 270.0, 0.0, 0.0, 1.5, 0.0, 0.0],
+    # one site type only, no association as in feos
+    "one-site": [2.0, 3.5, 250.0, 0.03, 2500.0, 0.0, 1.0, 0.0],
+}
+FOUR_SITES = [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 2.0, 2.0]
+# (T, P, phase, ..., y), liquid states
+STATES = np.asarray(
+    [
+        [250.0, 1.0e5, 1.0, 0.0, 1.0e5],
+        [280.0, 1.0e6, 1.0, 0.0, 1.0e5],
+        [300.0, 5.0e6, 1.0, 0.0, 1.0e5],
+    ]
+)
+
+
+def batch(parameters: list) -> tuple:
+    "Parameters, states and mask of a batch of components at `STATES`."
+    para = np.asarray(parameters)
+    states = np.repeat(STATES[np.newaxis], para.shape[0], axis=0)
+    return para, states, np.ones(states.shape[:2], dtype=bool)
+
+
+def finite_differences(fn, para: np.ndarray, step: float = 1e-6) -> np.ndarray:
+    "Central differences of `fn(para, STATES)` over the nonzero entries of `para[:5]`."
+    jac = np.zeros((STATES.shape[0], para.shape[0]))
+    for k in np.flatnonzero(para[:5]):
+        h = step * para[k]
+        para_p, para_m = para.copy(), para.copy()
+        para_p[k] += h
+        para_m[k] -= h
+        jac[:, k] = (fn(para_p, STATES) - fn(para_m, STATES)) / (2 * h)
+    return jac
+
+
+def test_pure_variant():
+    "Association needs both site types, and only 2B is implemented."
+    assert pure_variant(PARAMETERS["associating"]) == "assoc"
+    assert pure_variant(PARAMETERS["one-site"]) == "nonpolar"
+    assert pure_variant(PARAMETERS["polar"]) == "polar"
+    assert pure_variant(FOUR_SITES) is None
+
+
+def test_batch_kernels_match_feos():
+    "Density and vapor pressure of each variant against feos."
+    para, states, mask = batch(list(PARAMETERS.values()))
+    den = batch_pure_dispatch(batch_pure_den, para, states, mask)
+    vp = batch_pure_dispatch(batch_pure_vp, para, states, mask)
+    for i, parameters in enumerate(para):
+        np.testing.assert_allclose(
+            den[i], utils.pure_den_feos_batch(parameters, STATES), rtol=1e-5
+        )
+        np.testing.assert_allclose(
+            vp[i], utils.pure_vp_feos_curve(parameters, STATES), rtol=1e-5
+        )
+
+
+def test_unsupported_sites():
+    "Compounds without a variant are unsupported, the others still solved."
+    para, states, mask = batch([PARAMETERS["non-associating"], FOUR_SITES])
+    res = batch_pure_dispatch(batch_pure_den_result, para, states, mask)
+    assert np.all(res.converged[0]) and not np.any(res.converged[1])
+    assert np.all(np.isnan(res.rho[1]))
+    assert np.all(res.status[1] == SolverStatus.UNSUPPORTED)
+
+
+def test_pcsaft_hvap_matches_feos():
+    "Enthalpy of vaporization against feos."
+    para = np.asarray(PARAMETERS["associating"])
+    t = STATES[1, 0]
+    vle = PhaseEquilibrium.pure(utils.pure_eos_feos(para), t * KELVIN)
+    ref = (
+        vle.vapor.molar_enthalpy(Contributions.Residual)
+        - vle.liquid.molar_enthalpy(Contributions.Residual)
+    ) / (JOULE / MOL)
+    hvap = pcsaft_hvap(X_PURE, t, 1.0e5, pure_params(para, "assoc"))
+    np.testing.assert_allclose(hvap, ref, rtol=1e-6)
+
+
+@pytest.mark.parametrize("compound", ["non-associating", "associating"])
+def test_implicit_gradients(compound):
+    "`pure_den_grad` and `pure_vp_grad` against finite differences of feos."
+    para = np.asarray(PARAMETERS[compound])
+    nonzero = np.flatnonzero(para[:5])
+    for grad_fn, feos_fn in (
+        (pure_den_grad, utils.pure_den_feos_batch),
+        (pure_vp_grad, utils.pure_vp_feos_curve),
+    ):
+        grad = grad_fn(para, STATES, feos_fn(para, STATES), pure_variant(para))
+        np.testing.assert_allclose(
+            np.asarray(grad)[:, nonzero],
+            finite_differences(feos_fn, para)[:, nonzero],
+            rtol=1e-3,
+        )
+
+
+def test_pcsaft_vp_converged():
+    "`pcsaft_VP` is the converged vapor pressure for any initial guess."
+    para = np.asarray(PARAMETERS["non-associating"])
+    ref = utils.pure_vp_feos(para, STATES[1])
+    params = pure_params(para, "nonpolar")
+    for p_guess in (0.5 * ref, 1.3 * ref):
+        np.testing.assert_allclose(
+            pcsaft_VP(X_PURE, STATES[1, 0], p_guess, params), ref, rtol=1e-6
+        )
@@ -0,0 +1,23 @@
+"""Tests of the process pool of `epcsaft.parallel`."""
+
+import math
+
+from gnnepcsaft.epcsaft import parallel
+
+
+def test_run_jobs_order_and_errors():
+    "Results keep the order of the jobs, with exceptions captured per job."
+    jobs = [(4.0,), (-1.0,), (9.0,), (16.0,)]
+    try:
+        results = parallel.run_jobs(math.sqrt, jobs, max_workers=2)
+    finally:
+        parallel.shutdown_pools()
+    assert [job.result for job in results] == [2.0, None, 3.0, 4.0]
+    assert [job.error is None for job in results] == [True, False, True, True]
+    assert "ValueError" in results[1].error
+
+
+def test_run_jobs_serial():
+    "One worker runs the jobs in the current process."
+    results = parallel.run_jobs(math.sqrt, [(4.0,), (-1.0,)], max_workers=1)
+    assert results[0].result == 2.0 and results[1].error is not None
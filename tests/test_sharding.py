@@ -0,0 +1,81 @@
+"""Tests of `epcsaft.sharding` over several host CPU devices."""
+
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+import torch
+
+from gnnepcsaft.epcsaft.epcsaftpure_jax import batch_pure_den, batch_pure_dispatch
+from gnnepcsaft.epcsaft.torch_bridge import batch_den_from_tensor
+
+# the device count is fixed once JAX starts, so the sharded run is a new process
+SCRIPT = """
+import json
+import sys
+
+from gnnepcsaft.epcsaft.sharding import set_host_device_count
+
+set_host_device_count(2)
+
+import jax
+
+jax.config.update("jax_enable_x64", True)
+
+import numpy as np
+import torch
+
+from gnnepcsaft.epcsaft.epcsaftpure_jax import batch_pure_den, batch_pure_dispatch
+from gnnepcsaft.epcsaft.torch_bridge import batch_den_from_tensor
+
+para, states = (np.asarray(array) for array in json.load(sys.stdin))
+mask = np.ones(states.shape[:2], bool)
+den = batch_pure_dispatch(batch_pure_den, para, states, mask)
+para_t = torch.tensor(para, requires_grad=True)
+den_t = batch_den_from_tensor(para_t, torch.tensor(states), torch.tensor(mask))
+den_t.sum().backward()
+print(
+    json.dumps(
+        [jax.local_device_count(), den.tolist(), den_t.tolist(), para_t.grad.tolist()]
+    )
+)
+"""
+
+# three molecules, padded to four over the two devices
+PARA = np.asarray(
+    [
+        [2.0, 3.5, 250.0, 0, 0, 0, 0, 0],
+        [1.5, 3.2, 200.0, 0, 0, 0, 0, 0],
+        [3.0, 3.8, 260.0, 0, 0, 0, 0, 0],
+    ]
+)
+STATES = np.tile(
+    np.asarray([[250, 1e5, 1, 0, 1e5], [280, 1e6, 1, 0, 1e5]], dtype=float), (3, 1, 1)
+)
+
+
+def test_sharded_matches_single_device():
+    "Values and parameter gradients on two devices match one device."
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    out = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        input=json.dumps([PARA.tolist(), STATES.tolist()]),
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    num_devices, den, den_t, grad = json.loads(out.stdout.splitlines()[-1])
+    assert num_devices == 2
+
+    mask = np.ones(STATES.shape[:2], bool)
+    para = torch.tensor(PARA, requires_grad=True)
+    den_ref = batch_den_from_tensor(para, torch.tensor(STATES), torch.tensor(mask))
+    den_ref.sum().backward()
+    np.testing.assert_allclose(
+        den, batch_pure_dispatch(batch_pure_den, PARA, STATES, mask), rtol=1e-10
+    )
+    np.testing.assert_allclose(den_t, den_ref.detach().numpy(), rtol=1e-10)
+    np.testing.assert_allclose(grad, para.grad.numpy(), rtol=1e-8, atol=1e-12)
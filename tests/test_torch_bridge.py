@@ -0,0 +1,45 @@
+"""Tests of the Torch bridge of `epcsaft.torch_bridge` against the feos functions."""
+
+import numpy as np
+import pytest
+import torch
+
+from gnnepcsaft.epcsaft import utils
+from gnnepcsaft.epcsaft.torch_bridge import batch_den_from_tensor, batch_vp_from_tensor
+
+# (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb)
+PARAMETERS = [
+    [2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0],
+]
+# (T, P, phase, ..., y), liquid states
+STATES = np.asarray(
+    [
+        [250.0, 1.0e5, 1.0, 0.0, 1.0e5],
+        [280.0, 1.0e6, 1.0, 0.0, 1.0e5],
+        [300.0, 5.0e6, 1.0, 0.0, 1.0e5],
+    ]
+)
+
+
+@pytest.mark.parametrize(
+    "batch_fn, from_tensor",
+    [
+        (batch_den_from_tensor, utils.DenFromTensor.apply),
+        (batch_vp_from_tensor, utils.VpFromTensor.apply),
+    ],
+)
+def test_torch_bridge(batch_fn, from_tensor):
+    "Values and gradients of the torch bridge against the feos autograd functions."
+    para = torch.tensor(PARAMETERS, dtype=torch.float64, requires_grad=True)
+    states = torch.tensor(np.repeat(STATES[None], para.shape[0], 0))
+    mask = torch.ones(states.shape[:2], dtype=torch.bool)
+    weights = torch.arange(1.0, STATES.shape[0] + 1, dtype=torch.float64)
+    out = batch_fn(para, states, mask)
+    (out * weights).sum().backward()
+    for i in range(para.shape[0]):
+        para_i = para[i].detach().clone().requires_grad_()
+        ref = from_tensor(para_i, torch.tensor(STATES))
+        (ref * weights).sum().backward()
+        torch.testing.assert_close(out[i].detach(), ref.detach(), rtol=1e-5, atol=0)
+        torch.testing.assert_close(para.grad[i], para_i.grad, rtol=1e-3, atol=1e-12)
@@ -0,0 +1,31 @@
+"""Tests of the training helpers of `train.utils`."""
+
+import pytest
+import torch
+
+# the training stack is an optional part of the environment
+for module in ("lightning", "ml_collections", "ogb", "ray", "torch_geometric"):
+    pytest.importorskip(module)
+
+# pylint: disable = wrong-import-position
+from gnnepcsaft.train.utils import split_thermoml_states
+
+INCHI = "InChI=1S/CH4/h1H4"
+
+
+def test_split_thermoml_states():
+    "Each InChI keeps all its states, split into disjoint loss and validation parts."
+    rho = torch.arange(50.0, dtype=torch.float64).view(10, 5) + 1.0
+    vp = torch.arange(5.0, dtype=torch.float64).view(1, 5) + 1.0
+    loss_data, val_data = split_thermoml_states({INCHI: (rho, vp)}, 0.2)
+    loss_rho, loss_vp = loss_data[INCHI]
+    val_rho, val_vp = val_data[INCHI]
+    assert (loss_rho.shape[0], val_rho.shape[0]) == (8, 2)
+    merged = torch.cat([loss_rho, val_rho])
+    torch.testing.assert_close(merged[merged[:, 0].argsort()], rho)
+    # a single state rounds to no validation state, a zero state (no data)
+    torch.testing.assert_close(loss_vp, vp)
+    assert torch.all(val_vp == 0)
+    # the split is reproducible
+    loss_again, _ = split_thermoml_states({INCHI: (rho, vp)}, 0.2)
+    torch.testing.assert_close(loss_again[INCHI][0], loss_rho)
@@ -0,0 +1,90 @@
+"""Tests of the feos based ePC-SAFT functions of `epcsaft.utils`."""
+
+import numpy as np
+import pytest
+import torch
+
+from gnnepcsaft.epcsaft import utils
+
+# (m, sigma, e, kappa_ab, epsilon_k_ab, mu, na, nb)
+PARAMETERS = {
+    "non-associating": [2.0, 3.5, 250.0, 0.0, 0.0, 0.0, 0.0, 0.0],
+    "associating": [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 1.0, 1.0],
+    "polar": [2.5, 3.6, 270.0, 0.0, 0.0, 1.5, 0.0, 0.0],
+}
+# (T, P, phase, ..., y), liquid states
+STATES = np.asarray(
+    [
+        [250.0, 1.0e5, 1.0, 0.0, 1.0e5],
+        [280.0, 1.0e6, 1.0, 0.0, 1.0e5],
+        [300.0, 5.0e6, 1.0, 0.0, 1.0e5],
+    ]
+)
+COMPOUNDS = pytest.mark.parametrize("compound", list(PARAMETERS))
+
+
+@COMPOUNDS
+def test_feos_batch_matches_per_state(compound):
+    "The batched feos functions give the per-state results in one call."
+    para = np.asarray(PARAMETERS[compound])
+    den = [utils.pure_den_feos(para, state) for state in STATES]
+    vp = [utils.pure_vp_feos(para, state) for state in STATES]
+    np.testing.assert_allclose(utils.pure_den_feos_batch(para, STATES), den)
+    np.testing.assert_allclose(utils.pure_vp_feos_batch(para, STATES), vp)
+
+
+def test_eos_cache():
+    "Parameter vectors equal after rounding share one cached equation of state."
+    para = np.asarray(PARAMETERS["non-associating"])
+    utils.eos_cache_clear()
+    eos = utils.pure_eos_feos(para)
+    assert utils.pure_eos_feos(para + 1e-12) is eos
+    info = utils.eos_cache_info()
+    assert (info.hits, info.misses, info.currsize) == (1, 1, 1)
+    utils.pure_eos_feos(para * 1.01)
+    assert utils.eos_cache_info().misses == 2
+    utils.eos_cache_clear()
+    assert utils.eos_cache_info().currsize == 0
+
+
+def test_superanc_matches_feos():
+    "Superancillary vapor pressure against feos, no solve above the critical point."
+    para = np.asarray(PARAMETERS["non-associating"])
+    states = np.vstack([STATES, [[2000.0, 1.0e5, 0.0, 0.0, 1.0e5]]])
+    vp, status = utils.pure_vp_superanc(para, states, return_status=True)
+    np.testing.assert_allclose(
+        vp[:-1], utils.pure_vp_feos_batch(para, STATES), rtol=1e-6
+    )
+    assert np.isnan(vp[-1]) and status[-1] == utils.SolverStatus.ABOVE_CRITICAL
+
+
+def test_den_series_matches_batch():
+    "Warm-started isobars and the per-state fallback give the cold-start densities."
+    para = np.asarray(PARAMETERS["non-associating"])
+    isobar = np.zeros((utils.SERIES_MIN_STATES + 4, 5))
+    # crosses the saturation temperature, so liquid and vapor states
+    isobar[:, 0] = np.linspace(200.0, 400.0, isobar.shape[0])
+    isobar[:, 1] = 1.0e5
+    states = np.vstack([isobar, STATES])
+    den, status = utils.pure_den_feos_series(para, states, return_status=True)
+    np.testing.assert_allclose(den, utils.pure_den_feos_batch(para, states), rtol=1e-9)
+    assert np.all(status == utils.SolverStatus.CONVERGED)
+
+
+def test_unsupported_jacobian():
+    "Compounds without a JAX kernel variant get feos values and zero gradients."
+    para = torch.tensor(
+        [1.5, 3.0, 250.0, 0.03, 2500.0, 0.0, 2.0, 2.0], dtype=torch.float64
+    )
+    para.requires_grad_()
+    for from_tensor, feos_fn in (
+        (utils.DenFromTensor.apply, utils.pure_den_feos_batch),
+        (utils.VpFromTensor.apply, utils.pure_vp_feos_curve),
+    ):
+        para.grad = None
+        out = from_tensor(para, torch.tensor(STATES))
+        out.sum().backward()
+        params = para.detach().numpy()
+        assert torch.all(torch.isfinite(out))
+        np.testing.assert_allclose(out.detach(), feos_fn(params, STATES), rtol=1e-10)
+        assert torch.all(para.grad == 0)